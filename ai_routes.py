@@ -1,13 +1,252 @@
-from flask import Blueprint, request, jsonify
+import os, hmac, json, base64
+from typing import Optional
+from flask import Blueprint, Response, request, jsonify, stream_with_context, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import summarizer, uploads, jobs, batch, timing, pdf_engines, worker_pool, llm_summary, tender_index
+from summary_cache import default_cache
 
 ai_bp = Blueprint("ai", __name__)
+metrics_bp = Blueprint("metrics", __name__)
+
+PDF_MIMETYPES = ("application/pdf", "application/octet-stream")
+
+def _result_headers(resp, result):
+    resp.headers["Server-Timing"] = timing.server_timing(result["timings"], result["total_ms"])
+    status = result["cache"]
+    hits = sum(v == "hit" for v in status.values())
+    resp.headers["X-Cache"] = "HIT" if hits == len(status) else ("PARTIAL" if hits else "MISS")
+    resp.headers["X-Cache-Stages"] = ",".join(f"{k}={v}" for k, v in status.items())
+    resp.headers["X-Content-SHA256"] = result["sha256"]
+    resp.headers["X-Summary-Source"] = result["summary_source"]
+    return resp
+
+def _admin_ok() -> bool:
+    """Cache purges need X-Admin-Token matching CACHE_ADMIN_TOKEN; with no token configured they are refused."""
+    token = os.environ.get("CACHE_ADMIN_TOKEN")
+    given = request.headers.get("X-Admin-Token") or ""
+    return bool(token) and hmac.compare_digest(given.encode(), token.encode())
+
+def _options() -> dict:
+    """Options from a JSON body, a multipart "json" part/field (bin/summarize), form fields or the query string."""
+    opts = dict(request.args.items())
+    part = request.files.get("json") if request.files else None
+    raw = part.read() if part else (request.form.get("json") if request.form else None)
+    if raw:
+        try:
+            opts.update(json.loads(raw))
+        except (TypeError, ValueError):
+            pass
+    if request.form:
+        opts.update((k, v) for k, v in request.form.items() if k != "json")
+    data = request.get_json(silent=True) if request.is_json else None
+    if isinstance(data, dict):
+        opts.update(data)
+    return opts
+
+def _flag(value) -> Optional[bool]:
+    """Tri-state request option: None when absent (use the server default)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() not in ("0", "false", "no", "off")
+
+def _upload(opts: dict):
+    """The PDF as an uploads.Upload (raw body or multipart "file") or as bytes (legacy base64 "content")."""
+    filename = opts.get("filename") or request.headers.get("X-Filename")
+    up = None
+    if request.mimetype in PDF_MIMETYPES:
+        up = uploads.spool_stream(request.stream, filename or "document.pdf")
+    elif request.files and "file" in request.files:
+        up = uploads.from_file_storage(request.files["file"])
+        up.filename = filename or up.filename
+    if up is not None:
+        if up.size:
+            return up
+        up.close()  # an empty body is a missing PDF
+        return None
+    content = opts.get("content")
+    if not content:
+        return None
+    if not isinstance(content, str):
+        raise ValueError("'content' must be a string")
+    return base64.b64decode(content.split(",")[-1], validate=True) or None
+
+class _BadRequest(Exception):
+    def __init__(self, response):
+        self.response = response
+
+def _too_large() -> _BadRequest:
+    return _BadRequest((jsonify(error=f"upload exceeds {uploads.max_upload_bytes()} bytes"), 413))
+
+def _pdf_request():
+    """(opts, max_pages, pdf) for an upload-carrying request; raises _BadRequest with the error response."""
+    try:
+        opts = _options()
+        max_pages = int(opts.get("max_pages") or 20)
+    except RequestEntityTooLarge:
+        raise _too_large()
+    except (TypeError, ValueError):
+        raise _BadRequest((jsonify(error="'max_pages' must be an integer"), 400))
+    try:
+        pdf = _upload(opts)
+    except (uploads.UploadTooLarge, RequestEntityTooLarge):
+        raise _too_large()
+    except ValueError:  # binascii.Error included
+        raise _BadRequest((jsonify(error="'content' is not valid base64"), 400))
+    if pdf is None:
+        raise _BadRequest((jsonify(error="missing PDF: send 'file' (multipart), an application/pdf body, "
+                                         "or 'content' (base64)"), 400))
+    return opts, max_pages, pdf
 
 @ai_bp.route("/v2/summarize", methods=["POST"])
 def v2_summarize():
-    data = request.get_json(silent=True) or {}
-    content = data.get("content") or request.form.get("content")
-    filename = data.get("filename") or request.form.get("filename")
-    if not content:
-        return jsonify(error="missing 'content' (base64)"), 400
-    # Stub response for route verification; we will plug in real summarizer next.
-    return jsonify(ok=True, route="/ai/v2/summarize", filename=filename or "unknown"), 200
+    try:
+        opts, max_pages, pdf = _pdf_request()
+    except _BadRequest as e:
+        return e.response
+    llm = _flag(opts.get("llm"))
+    if isinstance(pdf, uploads.Upload):
+        with pdf:
+            result = summarizer.summarize(pdf.path, pdf.filename, max_pages, sha=pdf.sha256, llm=llm)
+    else:
+        result = summarizer.summarize(pdf, opts.get("filename") or "document.pdf", max_pages, llm=llm)
+    if not result["engine"]:
+        return jsonify(ok=False, filename=result["filename"], sha256=result["sha256"],
+                       error="not a readable PDF: no engine could open it"), 422
+    resp = jsonify(ok=True, filename=result["filename"], pages=result["pages"], engine=result["engine"],
+                   fields=result["fields"], summary=result["summary"], summary_source=result["summary_source"],
+                   checklist=result["checklist"],
+                   evidence=result["evidence"], summary_html=result["summary_html"])
+    return _result_headers(resp, result)
+
+@ai_bp.route("/v2/summarize/batch", methods=["POST"])
+def v2_summarize_batch():
+    """Zip of PDFs or NDJSON of {filename, content, max_pages} -> NDJSON, one line per document as it finishes."""
+    limit = uploads.max_batch_upload_bytes()
+    try:
+        opts = _options()
+        max_pages = int(opts.get("max_pages") or 20)
+        if request.files and "file" in request.files:
+            body = uploads.from_file_storage(request.files["file"], limit)
+        else:
+            body = uploads.spool_stream(request.stream, "batch", limit)
+    except (uploads.UploadTooLarge, RequestEntityTooLarge):
+        return jsonify(error=f"batch exceeds {limit} bytes"), 413
+    except (TypeError, ValueError):
+        return jsonify(error="'max_pages' must be an integer"), 400
+    try:
+        docs = batch.documents(body.path, max_pages)
+    except batch.BatchError as e:
+        body.close()
+        return jsonify(error=str(e)), 400
+
+    def stream():
+        with body:
+            yield from batch.run(docs)
+    # keep the request (and its spooled multipart file) alive until the last line is sent
+    return Response(stream_with_context(stream()), mimetype="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@ai_bp.route("/v2/jobs", methods=["POST"])
+def v2_jobs_submit():
+    try:
+        opts, max_pages, pdf = _pdf_request()
+    except _BadRequest as e:
+        return e.response
+    store = jobs.default_store()
+    try:
+        if isinstance(pdf, uploads.Upload):
+            with pdf:
+                job = store.submit(pdf, pdf.filename, max_pages)
+        else:
+            job = store.submit(pdf, opts.get("filename") or "document.pdf", max_pages)
+    except jobs.QueueFull as e:
+        resp = jsonify(error=str(e), queue=store.stats())
+        resp.headers["Retry-After"] = "30"
+        return resp, 429
+    jobs.pump(store)
+    status_url = url_for("ai.v2_jobs_get", job_id=job["id"])
+    resp = jsonify(job_id=job["id"], status=job["status"], status_url=status_url)
+    resp.headers["Location"] = status_url
+    resp.headers["X-Queue-Depth"] = str(store.depth())
+    return resp, 202
+
+@ai_bp.route("/v2/jobs/<job_id>", methods=["GET"])
+def v2_jobs_get(job_id):
+    store = jobs.default_store()
+    jobs.pump(store)  # picks up jobs orphaned by a restarted worker
+    job = store.get(job_id)
+    if job is None:
+        return jsonify(error="unknown job"), 404
+    return jsonify(job)
+
+@ai_bp.route("/v2/jobs", methods=["GET"])
+def v2_jobs_stats():
+    store = jobs.default_store()
+    jobs.pump(store)
+    return jsonify(store.stats())
+
+@ai_bp.route("/v2/search", methods=["GET", "POST"])
+def v2_search():
+    """Search every summarised tender: ?q=site visit&buyer=nrcan&checklist_mandatory_site_visit=yes&closing_from=2025-09-01"""
+    index = tender_index.default_index()
+    if index is None:
+        return jsonify(error="search index disabled (set INDEX_DIR to enable it)"), 503
+    opts = dict(request.args.items())
+    data = request.get_json(silent=True) if request.is_json else None
+    if isinstance(data, dict):
+        opts.update(data)
+    try:
+        limit = min(100, max(1, int(opts.pop("limit", None) or 20)))
+        offset = max(0, int(opts.pop("offset", None) or 0))
+    except (TypeError, ValueError):
+        return jsonify(error="'limit' and 'offset' must be integers"), 400
+    q = str(opts.pop("q", None) or "")
+    dates = {}
+    for key in ("closing_from", "closing_to"):
+        raw = opts.pop(key, None)
+        dates[key] = tender_index.iso_date(str(raw)) if raw else ""
+        if raw and not dates[key]:
+            return jsonify(error=f"'{key}' is not a date (use YYYY-MM-DD)"), 400
+    filters = {k: v for k, v in opts.items() if v not in (None, "")}
+    known = index.stats()["fields"]
+    unknown = [k for k in filters if tender_index.slug(k) not in known]
+    if known and unknown:
+        return jsonify(error=f"unknown filter {unknown[0]!r}", fields=known), 400
+    return jsonify(ok=True, **index.search(q, filters, limit=limit, offset=offset, **dates))
+
+@ai_bp.route("/v2/cache", methods=["GET"])
+def v2_cache_stats():
+    return jsonify(default_cache().stats())
+
+@ai_bp.route("/v2/cache", methods=["DELETE"])
+@ai_bp.route("/v2/cache/<sha256>", methods=["DELETE"])
+def v2_cache_purge(sha256=None):
+    if not _admin_ok():
+        return jsonify(error="forbidden: set CACHE_ADMIN_TOKEN and send it as X-Admin-Token"), 403
+    return jsonify(ok=True, purged=default_cache().purge(sha256))
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text: per-stage / per-engine latency histograms plus queue and cache gauges (this worker)."""
+    gauges = {"summarizer_worker_pool_size": worker_pool.size(),
+              "summarizer_worker_pool_in_flight": worker_pool.in_flight(),
+              "summarizer_pdf_workers": pdf_engines.pool_size()}
+    for status, n in jobs.default_store().stats().items():
+        if status in ("queued", "running", "done", "failed"):
+            gauges[f'summarizer_jobs{{status="{status}"}}'] = n
+    cache = default_cache().stats()
+    for stage, n in cache["hits"].items():
+        gauges[f'summarizer_cache_hits{{stage="{stage}"}}'] = n
+    for stage, n in cache["misses"].items():
+        gauges[f'summarizer_cache_misses{{stage="{stage}"}}'] = n
+    gauges["summarizer_cache_memory_bytes"] = cache["memory_bytes"]
+    index = tender_index.default_index()
+    if index is not None:
+        stats = index.stats()
+        gauges["summarizer_index_documents"] = stats["documents"]
+        gauges["summarizer_index_bytes"] = stats["bytes"]
+    for name, n in llm_summary.STATS.items():
+        gauges[f"summarizer_llm_{name}"] = n
+    return Response(timing.render_prometheus(gauges), mimetype="text/plain; version=0.0.4")
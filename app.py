@@ -1,16 +1,7 @@
-from flask import Flask, jsonify
-from ai_routes import ai_bp
+import os
+from app_factory import create_app
 
-app = Flask(__name__)
-app.register_blueprint(ai_bp, url_prefix="/ai")
-
-@app.get("/routes")
-def routes():
-    return jsonify(sorted([str(r) for r in app.url_map.iter_rules()]))
-
-@app.get("/health")
-def health():
-    return "ok", 200
+app = create_app("app")
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8080)
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
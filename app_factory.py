@@ -0,0 +1,124 @@
+"""The one Flask app factory behind app.py, server.py and summarizer_entry.py.
+
+create_app() registers the routes, runs the warm-up (see warmup.py) and logs a
+BOOT: line with import and warm-up times. /health answers 503 until the warm-up
+has finished. Each process also logs its time to first response, measured from
+process start or, under gunicorn --preload, from the fork:
+
+    gunicorn app:app --preload --workers 2
+
+gunicorn.conf.py calls worker_started() from post_fork. That starts the job
+pump and, with WARMUP=background, the warm-up thread in each worker, never in
+the master. Without it (other servers), both start on the first request.
+"""
+import os, time, threading
+_T0 = time.perf_counter()
+
+from flask import Flask, g, jsonify, request
+from ai_routes import ai_bp, metrics_bp
+import uploads, warmup, jobs
+
+IMPORT_MS = round((time.perf_counter() - _T0) * 1000, 1)
+
+_STARTED = {"t": _T0, "pid": os.getpid(), "answered": False}
+_WORKER = {"pid": None, "starters": []}  # starters: background warm-ups waiting for a worker
+
+def worker_started():
+    """Per-worker start-up, from gunicorn's post_fork (see gunicorn.conf.py).
+
+    Resumes queued / orphaned jobs without waiting for a request and starts any
+    background warm-up, so no thread is ever started in a --preload master.
+    """
+    if _WORKER["pid"] == os.getpid():
+        return
+    _WORKER["pid"] = os.getpid()
+    if _STARTED["pid"] != os.getpid():
+        _STARTED.update(t=time.perf_counter(), pid=os.getpid(), answered=False)
+    jobs.start_pumping()
+    for start in _WORKER["starters"]:
+        start()
+
+def _process_ms():
+    """Wall time since exec, from /proc (covers interpreter start-up, which _T0 can't see)."""
+    try:
+        with open("/proc/self/stat") as fh:
+            started = int(fh.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as fh:
+            return round((float(fh.read().split()[0]) - started) * 1000)
+    except (OSError, ValueError, IndexError):
+        return None
+
+def create_app(entry: str = "app") -> Flask:
+    t0 = time.perf_counter()
+    app = Flask(__name__)
+    uploads.init_app(app)
+    app.register_blueprint(ai_bp, url_prefix="/ai")
+    app.register_blueprint(metrics_bp)
+    state = app.extensions["warmup"] = {"ready": False, "mode": warmup.mode(), "report": {}}
+
+    @app.get("/health")
+    def health():
+        if state["ready"]:
+            return "ok", 200
+        return jsonify(status="warming", mode=state["mode"]), 503
+
+    @app.get("/routes")
+    def routes():
+        return jsonify(sorted([str(r) for r in app.url_map.iter_rules()]))
+
+    @app.get("/whoami")
+    def whoami():
+        return jsonify(entrypoint=entry, revision=os.environ.get("K_REVISION"), pid=os.getpid(),
+                       import_ms=IMPORT_MS, warmup=state["report"])
+
+    @app.before_request
+    def _request_start():
+        g.request_t0 = time.perf_counter()
+        jobs.start_pumping()  # no-op after the first call in this process (covers non-forking servers)
+        if state["mode"] == "background":
+            warm_in_background()
+
+    @app.after_request
+    def _first_response(resp):
+        if not _STARTED["answered"]:
+            _STARTED["answered"] = True
+            now = time.perf_counter()
+            print(f"BOOT: entry={entry} pid={os.getpid()} first_response_ms={(now - _STARTED['t']) * 1000:.1f} "
+                  f"request_ms={(now - g.get('request_t0', now)) * 1000:.1f} path={request.path} "
+                  f"status={resp.status_code}", flush=True)
+        return resp
+
+    def warm():
+        state["report"] = warmup.run()
+        state["ready"] = True
+        r = state["report"]
+        steps = " ".join(f"{k}={v}" for k, v in r["ms"].items())
+        errors = "".join(f" {k}_error={v!r}" for k, v in r.get("errors", {}).items())
+        print(f"BOOT: entry={entry} pid={os.getpid()} warmup_ms={r['total_ms']} ({steps}) "
+              f"engine={r.get('engine')} ready=1{errors}", flush=True)
+
+    warming = {"pid": None, "lock": threading.Lock()}
+
+    def warm_in_background():
+        with warming["lock"]:
+            if state["ready"] or warming["pid"] == os.getpid():
+                return
+            warming["pid"] = os.getpid()
+        threading.Thread(target=warm, name="warmup", daemon=True).start()
+
+    if state["mode"] == "sync":
+        warm()
+    elif state["mode"] == "background":
+        # Only in a known worker: under --preload this is the master, and a fork while the
+        # warm-up thread holds an index or cache lock leaves that lock held forever in the child.
+        if _WORKER["pid"] == os.getpid():
+            warm_in_background()
+        else:
+            _WORKER["starters"].append(warm_in_background)
+    else:
+        state["ready"] = True
+
+    print(f"BOOT: entry={entry} pid={os.getpid()} import_ms={IMPORT_MS} process_ms={_process_ms()} "
+          f"create_ms={(time.perf_counter() - t0) * 1000:.1f} warmup={state['mode']} ready={int(state['ready'])} "
+          f"routes={sorted([str(r) for r in app.url_map.iter_rules()])}", flush=True)
+    return app
@@ -0,0 +1,184 @@
+"""Batch summarization: many PDFs in, one NDJSON line per document out.
+
+Input is a zip of PDFs or NDJSON lines of {"filename", "content" (base64),
+"max_pages"}. Documents run concurrently on the shared worker_pool and lines
+are yielded in completion order; a document that fails (too large, not a PDF)
+produces an error line without affecting the rest. Each document is spooled to
+its own temp file first, capped at MAX_UPLOAD_MB like a single upload, and
+extracted by path.
+"""
+import os, json, time, base64, zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Iterator, NamedTuple, Optional
+
+import summarizer, uploads, worker_pool
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+def max_docs() -> int:
+    return int(os.environ.get("BATCH_MAX_DOCS") or 100)
+
+class Doc(NamedTuple):
+    index: int
+    filename: str
+    load: object          # () -> uploads.Upload (spooled to disk); may raise
+    max_pages: int
+
+class BatchError(ValueError):
+    pass
+
+def _failing(exc: Exception):
+    def load():
+        raise exc
+    return load
+
+def _spool_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, filename: str, limit: int) -> uploads.Upload:
+    # spool_stream enforces the limit on the inflated bytes too, in case the header lies
+    with zf.open(info) as fh:
+        return uploads.spool_stream(fh, filename, limit)
+
+def _zip_docs(zf: zipfile.ZipFile, max_pages: int, limit: int) -> Iterator[Doc]:
+    # ZipFile serialises reads of the underlying file, so worker threads can share it
+    infos = [i for i in zf.infolist()
+             if not i.is_dir() and i.filename.lower().endswith(".pdf") and not i.filename.startswith("__MACOSX/")]
+    for n, info in enumerate(infos):
+        name = os.path.basename(info.filename)
+        if info.file_size > limit:
+            load = _failing(uploads.UploadTooLarge(f"{info.file_size} bytes uncompressed exceeds {limit}"))
+        else:
+            load = lambda info=info, name=name: _spool_member(zf, info, name, limit)
+        yield Doc(n, name, load, max_pages)
+
+class _Base64Reader:
+    """File-like read() over a base64 string, decoded a block at a time."""
+    def __init__(self, text: str):
+        self.text, self.pos = text, 0
+
+    def read(self, n: int = uploads.CHUNK) -> bytes:
+        step = max(4, n // 3 * 4)
+        part = self.text[self.pos:self.pos + step]
+        self.pos += len(part)
+        return base64.b64decode(part, validate=True)
+
+def _spool_base64(content: str, filename: str, limit: int) -> uploads.Upload:
+    data = content.split(",")[-1]
+    if len(data) // 4 * 3 > limit + 2:
+        raise uploads.UploadTooLarge(f"about {len(data) // 4 * 3} bytes decoded exceeds {limit}")
+    return uploads.spool_stream(_Base64Reader(data), filename, limit)
+
+def _line_cap(limit: int) -> int:
+    # base64 of a limit-sized PDF plus the JSON around it
+    return limit * 4 // 3 + 4096
+
+def _ndjson_entry(fh, cap: int):
+    """(offset, length, item without its content, or the error) for the next non-blank line; None at EOF.
+
+    Lines over cap are skipped without being read into memory.
+    """
+    while True:
+        offset = fh.tell()
+        raw = fh.readline(cap + 1)
+        if not raw:
+            return None
+        if len(raw) > cap and not raw.endswith(b"\n"):
+            while raw and not raw.endswith(b"\n"):
+                raw = fh.readline(uploads.CHUNK)
+            return offset, 0, uploads.UploadTooLarge(f"NDJSON line exceeds {cap} bytes")
+        if raw.strip():
+            break
+    try:
+        item = json.loads(raw)
+        if not isinstance(item.pop("content"), str):
+            raise TypeError("'content' must be a base64 string")
+        item["max_pages"] = int(item.get("max_pages") or 0)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return offset, len(raw), BatchError(f"bad NDJSON line: {e}")
+    return offset, len(raw), item
+
+def _spool_line(path: str, offset: int, length: int, filename: str, limit: int) -> uploads.Upload:
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        content = json.loads(fh.read(length))["content"]
+    return _spool_base64(content, filename, limit)
+
+def _ndjson_docs(path: str, max_pages: int, limit: int) -> Iterator[Doc]:
+    # Docs hold a line's offset, not its content: run() reads ahead of the pool, and only
+    # the documents actually being spooled should have their base64 in memory.
+    cap = _line_cap(limit)
+    with open(path, "rb") as fh:
+        n = 0
+        while True:
+            entry = _ndjson_entry(fh, cap)
+            if entry is None:
+                return
+            offset, length, item = entry
+            if isinstance(item, Exception):
+                filename, pages, load = f"line-{n + 1}", max_pages, _failing(item)
+            else:
+                filename = item.get("filename") or f"document-{n + 1}.pdf"
+                pages = item["max_pages"] or max_pages
+                load = lambda offset=offset, length=length, filename=filename: _spool_line(
+                    path, offset, length, filename, limit)
+            yield Doc(n, filename, load, pages)
+            n += 1
+
+def documents(path: str, max_pages: int = 20, limit: Optional[int] = None) -> Iterator[Doc]:
+    """Docs in a spooled batch body: a zip archive (sniffed by magic) or NDJSON. limit caps each PDF."""
+    limit = uploads.max_upload_bytes() if limit is None else limit
+    with open(path, "rb") as fh:
+        head = fh.read(4)
+    if head == ZIP_MAGIC:
+        try:
+            return _zip_docs(zipfile.ZipFile(path), max_pages, limit)
+        except zipfile.BadZipFile as e:
+            raise BatchError(f"bad zip archive: {e}")
+    return _ndjson_docs(path, max_pages, limit)
+
+def _failed(doc: Doc, error: str, t0: float, **extra) -> dict:
+    return {"index": doc.index, "filename": doc.filename, "ok": False, "error": error, **extra,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+def _one(doc: Doc) -> dict:
+    t0 = time.perf_counter()
+    try:
+        with doc.load() as pdf:
+            result = summarizer.summarize(pdf.path, doc.filename, doc.max_pages, sha=pdf.sha256)
+    except Exception as e:
+        return _failed(doc, f"{type(e).__name__}: {e}", t0)
+    if not result["engine"]:
+        return _failed(doc, "not a readable PDF: no engine could open it", t0, sha256=result["sha256"])
+    return {"index": doc.index, "filename": doc.filename, "ok": True, "sha256": result["sha256"],
+            "pages": result["pages"], "engine": result["engine"], "fields": result["fields"],
+            "summary": result["summary"], "summary_source": result["summary_source"], "checklist": result["checklist"], "summary_html": result["summary_html"],
+            "cache": result["cache"], "timings": result["timings"], "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+def run(docs: Iterator[Doc], limit: Optional[int] = None) -> Iterator[str]:
+    """Summarize docs concurrently, yielding one NDJSON line per document as each finishes.
+
+    At most twice the pool size is submitted at a time, so only that many
+    documents are ever loaded into memory.
+    """
+    limit = max_docs() if limit is None else limit
+    window = worker_pool.size() * 2
+    t0 = time.perf_counter()
+    docs = iter(docs)
+    pending, total, ok = set(), 0, 0
+    while True:
+        for doc in docs:
+            total += 1
+            if total > limit:
+                yield json.dumps({"index": doc.index, "filename": doc.filename, "ok": False,
+                                  "error": f"batch limit of {limit} documents reached", "elapsed_ms": 0.0}) + "\n"
+                continue
+            pending.add(worker_pool.submit(_one, doc))
+            if len(pending) >= window:
+                break
+        if not pending:
+            break
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in finished:
+            line = f.result()
+            ok += line["ok"]
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    yield json.dumps({"done": True, "documents": total, "ok": ok, "failed": total - ok,
+                      "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)}) + "\n"
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Offline benchmark for the summarizer pipeline.
+
+Generates synthetic tender PDFs locally (no network, no fixtures), runs them
+through summarizer.summarize() with the cache disabled, and reports per-stage
+p50/p95 latency, peak RSS and throughput for each document size.
+
+    python bench.py                                # 1, 10, 50, 100, 250, 500 pages
+    python bench.py --pages 1,33,200 --reps 5 --engine pypdfium2
+    python bench.py --json bench.json              # save results
+    python bench.py --baseline bench.json          # exit 1 if p50 total regressed
+
+Peak RSS is this process's high-water mark while each stage ran (reset per
+stage on Linux). Pages extracted in the PDF process pool are not included;
+run with PDF_WORKERS=1 to measure extraction memory in-process.
+"""
+import os, sys, json, math, random, argparse, statistics
+from typing import Dict, List
+
+os.environ.setdefault("TIMING_LOG", "0")
+
+import summarizer, timing
+from summary_cache import SummaryCache
+
+# --------- synthetic tender PDFs ---------
+
+WORDS = ("the contractor must provide services deliverables schedule requirements bidder proposal "
+         "evaluation criteria rated mandatory canada department work statement annex security insurance "
+         "term contract period option years invoice payment milestone report acceptance technical "
+         "financial resource experience project manager site office ottawa quebec ontario").split()
+
+SECTIONS = ["PART 1 - GENERAL INFORMATION", "1.2 Summary", "PART 2 - BIDDER INSTRUCTIONS",
+            "PART 3 - BID PREPARATION INSTRUCTIONS", "PART 4 - EVALUATION PROCEDURES AND BASIS OF SELECTION",
+            "PART 5 - CERTIFICATIONS", "PART 6 - SECURITY, FINANCIAL AND INSURANCE REQUIREMENTS",
+            "PART 7 - RESULTING CONTRACT CLAUSES", "ANNEX A - STATEMENT OF WORK", "ANNEX B - BASIS OF PAYMENT"]
+
+def _sentence(rnd: random.Random) -> str:
+    words = [rnd.choice(WORDS) for _ in range(rnd.randint(8, 14))]
+    return " ".join(words).capitalize() + "."
+
+def _page_lines(rnd: random.Random, page: int, total: int, seed: int) -> List[str]:
+    lines = []
+    if page == 0:
+        lines += [f"RFP # NRCan-{5000000000 + seed}", "Natural Resources Canada",
+                  "Return Bids to: Bid Receiving Unit - Mailroom",
+                  f"Solicitation No. - NRCan-{5000000000 + seed}",
+                  "Solicitation Closes - L'invitation prend fin on 25 August 2025 at 2 p.m. EDT",
+                  "Address Enquiries to: Jane Smith", "jane.smith@nrcan-rncan.gc.ca",
+                  "Delivery Date: See herein", "Location: Ottawa, Ontario", ""]
+    if page < len(SECTIONS) or rnd.random() < 0.15:
+        lines += [SECTIONS[page % len(SECTIONS)]]
+    if page == 1:
+        lines += ["Term of Contract: One year from contract award with two option years",
+                  "INSURANCE - NO SPECIFIC REQUIREMENT", "Mandatory site visit: none", ""]
+    while len(lines) < 55:
+        lines.append(_sentence(rnd)[:95])
+    lines.append(f"Page {page + 1} of {total}")
+    return lines
+
+def _pdf_str(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: int, seed: int = 0) -> bytes:
+    """A valid PDF of `pages` text pages (Helvetica, ASCII) that reads like a federal RFP."""
+    rnd = random.Random(seed)
+    objs: List[bytes] = [b"", b""]  # 1: catalog, 2: page tree (filled in below)
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for p in range(pages):
+        body = "BT /F1 10 Tf 12 TL 50 760 Td " + " T* ".join(
+            f"({_pdf_str(line)}) Tj" for line in _page_lines(rnd, p, pages, seed)) + " ET"
+        data = body.encode("latin-1")
+        objs.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data))
+        content = len(objs)
+        objs.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                     f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content} 0 R >>").encode())
+        kids.append(len(objs))
+    objs[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objs[1] = ("<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{k} 0 R" for k in kids), pages)).encode()
+    out, offsets = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"), []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+# --------- harness ---------
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
+
+def run(sizes: List[int], reps: int, engine: str = "", pdfs: List[str] = ()) -> List[dict]:
+    if engine:
+        os.environ["PDF_ENGINE"] = engine
+    cache = SummaryCache(None, max_bytes=0)  # no memory or disk tier: every run does the full work
+    cases = [(f"synthetic-{n}p", make_pdf(n, seed=n), n) for n in sizes]
+    cases += [(os.path.basename(p), open(p, "rb").read(), 10 ** 6) for p in pdfs]
+    results = []
+    for name, pdf, max_pages in cases:
+        summarizer.summarize(pdf, name, max_pages, cache=cache)  # warm-up: imports, process pool
+        stages: Dict[str, List[float]] = {}
+        rss: Dict[str, int] = {}
+        totals, pages, engine_used = [], 0, None
+        for _ in range(reps):
+            t = timing.Timings(track_rss=True)
+            res = summarizer.summarize(pdf, name, max_pages, cache=cache, timings=t)
+            pages, engine_used = res["pages"], res["engine"]
+            totals.append(t.total_ms())
+            for stage, ms in t.as_dict().items():
+                stages.setdefault(stage, []).append(ms)
+            for stage, kb in t.rss_kb.items():
+                rss[stage] = max(rss.get(stage, 0), kb)
+        p50 = statistics.median(totals)
+        results.append({
+            "case": name, "bytes": len(pdf), "pages": pages, "engine": engine_used, "reps": reps,
+            "total": {"p50_ms": round(p50, 2), "p95_ms": round(_pct(totals, 0.95), 2)},
+            "pages_per_s": round(pages / (p50 / 1000), 1) if pages and p50 else 0.0,
+            "stages": {s: {"p50_ms": round(statistics.median(v), 2), "p95_ms": round(_pct(v, 0.95), 2),
+                           "peak_rss_mb": round(rss[s] / 1024, 1) if s in rss else None}
+                       for s, v in stages.items()},
+        })
+    return results
+
+def report(results: List[dict]):
+    print(f"{'case':<22}{'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'peak RSS MB':>13}")
+    for r in results:
+        for stage, s in r["stages"].items():
+            rss = "" if s["peak_rss_mb"] is None else s["peak_rss_mb"]
+            print(f"{r['case']:<22}{stage:<14}{s['p50_ms']:>10}{s['p95_ms']:>10}{rss:>13}")
+        print(f"{r['case']:<22}{'TOTAL':<14}{r['total']['p50_ms']:>10}{r['total']['p95_ms']:>10}"
+              f"   {r['pages']} pages via {r['engine']}, {r['pages_per_s']} pages/s")
+        if not r["engine"]:
+            print(f"{'':<22}(no PDF engine could open it: install pypdfium2, pypdf or pdfplumber)")
+
+def regressions(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    before = {r["case"]: r for r in baseline}
+    out = []
+    for r in results:
+        old = before.get(r["case"])
+        if old and r["total"]["p50_ms"] > old["total"]["p50_ms"] * (1 + tolerance):
+            out.append(f"{r['case']}: p50 {old['total']['p50_ms']} -> {r['total']['p50_ms']} ms")
+    return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--pages", default="1,10,50,100,250,500", help="comma-separated synthetic sizes")
+    ap.add_argument("--reps", type=int, default=3)
+    ap.add_argument("--engine", default="", help="force a PDF engine (PDF_ENGINE)")
+    ap.add_argument("--pdf", action="append", default=[], help="also benchmark a real PDF (repeatable)")
+    ap.add_argument("--write-pdf", metavar="DIR", help="only write the synthetic PDFs to DIR")
+    ap.add_argument("--json", metavar="PATH", help="write results as JSON")
+    ap.add_argument("--baseline", metavar="PATH", help="compare with a previous --json run")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown vs baseline")
+    args = ap.parse_args(argv)
+    sizes = [int(n) for n in args.pages.split(",") if n.strip()]
+
+    if args.write_pdf:
+        os.makedirs(args.write_pdf, exist_ok=True)
+        for n in sizes:
+            with open(os.path.join(args.write_pdf, f"synthetic-{n}p.pdf"), "wb") as fh:
+                fh.write(make_pdf(n, seed=n))
+        return 0
+
+    results = run(sizes, args.reps, args.engine, args.pdf)
+    report(results)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            slower = regressions(results, json.load(fh), args.tolerance)
+        for line in slower:
+            print("REGRESSION", line)
+        return 1 if slower else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Declarative field / checklist rules and the single-pass engine that runs them.
+
+Every rule is compiled once at import. Instead of one re.search per rule over
+the whole document, the engine walks the text once with a combined trigger
+pattern (the literal words each rule's match has to start with) and only tries
+a rule's full pattern, anchored, at those trigger positions. Rules drop out as
+soon as they have their matches, so cost grows with document size plus the
+number of trigger hits, not size x rules.
+
+Matches are identical to re.search / re.findall over the same text: a rule is
+tried at every position where a match could start, in document order.
+"""
+import re, bisect
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence
+
+DIGIT = r"\d"  # trigger for rules whose match starts with a digit
+
+class Rule(NamedTuple):
+    name: str
+    pattern: str
+    triggers: Sequence[str]  # lowercase literals (or DIGIT) every match starts with
+    flags: int = re.I | re.M
+    limit: int = 1           # non-overlapping matches to collect; 0 = all (re.findall)
+    rewind: str = ""         # char class a match may extend back over from its trigger
+
+class Hit(NamedTuple):
+    rule: str
+    value: str   # group 1 (stripped) when the pattern has one, else the whole match
+    start: int
+    end: int
+    page: int    # 0-based page the match starts on
+
+_DATE = (r"((?:\d{1,2}\s*(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sept?|Oct|Nov|Dec)[a-z]*\s*,?\s*\d{4})"
+         r"|(?:\d{4}-\d{2}-\d{2})|(?:\d{1,2}/\d{1,2}/\d{2,4}))")
+_TIME = r"(\d{1,2}\s*(?::\s*\d{2})?\s*(?:a\.?m\.?|p\.?m\.?|AM|PM|H))"
+
+RULES: List[Rule] = [
+    # IDs / buyer
+    Rule("rfp_number", r"(?:Solicitation\s*No\.\s*[-–]\s*|RFP\s*#?\s*|NRCan[-\s#:]*)\s*([A-Za-z]*[-]?\d{6,})",
+         ("solicitation", "rfp", "nrcan")),
+    Rule("rfp_number_nrcan", r"\b(NRCan-\d{6,})\b", ("nrcan",)),
+    Rule("buyer", r"(Natural Resources Canada|NRCan|Public Works and Government Services Canada|Parks Canada|Government of Canada)",
+         ("natural resources canada", "nrcan", "public works", "parks canada", "government of canada")),
+    # Contact
+    Rule("contact_email", r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", ("@",), flags=re.I, rewind=r"[A-Z0-9._%+-]"),
+    Rule("contact_name", r"(?:Address\s+Enquiries\s+to[:\-\s]*|Contracting\s*Authority[:\-\s]*)([^\n@]+)",
+         ("address", "contracting")),
+    # Dates
+    Rule("date", _DATE, (DIGIT,)),
+    Rule("time", _TIME, (DIGIT,)),
+    # Submission method
+    Rule("cpc_connect", r"\bCPC\s+Connect\b", ("cpc",), flags=re.I),
+    Rule("email_submission", r"\bemail|courriel", ("email", "courriel"), flags=re.I),
+    Rule("mailroom", r"Bid Receiving Unit|Mailroom", ("bid receiving unit", "mailroom"), flags=re.I),
+    # Location / delivery / term
+    Rule("delivery", r"(?:Destination|Delivery(?:\s*Date)?)[^\n]*:\s*([^\n]+)", ("destination", "delivery")),
+    Rule("location", r"(?:Location|Work Location|Place of Work)[^\n]*:\s*([^\n]+)", ("location", "work location", "place of work")),
+    Rule("term", r"(?:Term\s*of\s*Contract|Contract\s*Term)[^\n]*:\s*([^\n]+)", ("term", "contract")),
+    # Insurance / security (shared by the key fields and the checklist)
+    Rule("insurance_none", r"INSURANCE\s*[-–]\s*NO\s+SPECIFIC\s+REQUIREMENT", ("insurance",), flags=re.I),
+    Rule("insurance_none_hyphen", r"insurance\s*-\s*no\s*specific\s*requirement", ("insurance",), flags=re.I),
+    Rule("insurance", r"\binsurance\b", ("insurance",), flags=re.I),
+    Rule("security_none", r"NO\s+SECURITY\s+REQUIREMENTS", ("no",), flags=re.I),
+    Rule("security", r"security\s+requirement|reliability|secret\s*clearance", ("security", "reliability", "secret"), flags=re.I),
+    # Executive summary seed blocks (first two are used)
+    Rule("summary_block", r"(?:\b1\.2\s*Summary\b|^Summary\b|^Introduction\b|^Scope\b)[^\n]*\n([\s\S]{200,1000})",
+         ("1.2", "summary", "introduction", "scope"), limit=2),
+    # Checklist
+    Rule("site_visit", r"mandatory\s+site\s+visit", ("mandatory",), flags=re.I),
+    Rule("indigenous", r"indigenous|aboriginal|set-?aside", ("indigenous", "aboriginal", "set"), flags=re.I),
+    Rule("french", r"\bfran[cç]ais\b", ("fran",), flags=re.I),
+    Rule("sow", r"statement of work|annex\s*[“\"']?a[”\"']?", ("statement of work", "annex"), flags=re.I),
+    Rule("evaluation", r"evaluation\s+procedures|rated\s*criteria|mandatory\s+requirements",
+         ("evaluation", "rated", "mandatory"), flags=re.I),
+    Rule("contract_clauses", r"resulting\s+contract\s+clauses", ("resulting",), flags=re.I),
+]
+
+class _Compiled(NamedTuple):
+    rule: Rule
+    regex: "re.Pattern"
+    rewind: Optional["re.Pattern"]
+
+def _trie(words: Iterable[str]) -> str:
+    """Prefix-factored alternation of literals; the re module tries flat alternations branch by branch."""
+    tree: dict = {}
+    for w in sorted(set(words), key=len):
+        node = tree
+        for ch in w:
+            if node.get("") == 1:  # a shorter trigger already covers this one
+                break
+            node = node.setdefault(ch, {})
+        else:
+            node.clear(); node[""] = 1
+    def emit(node: dict) -> str:
+        alts = [re.escape(ch) + emit(sub) for ch, sub in sorted(node.items()) if ch]
+        return alts[0] if len(alts) == 1 else ("(?:" + "|".join(alts) + ")" if alts else "")
+    return emit(tree)
+
+def _key(ch: str) -> str:
+    # casefold, so e.g. U+017F (long s) still dispatches to rules triggered by "s"
+    return ch.casefold()[:1]
+
+class RuleSet:
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = [_Compiled(r, re.compile(r.pattern, r.flags),
+                                re.compile(r.rewind, r.flags) if r.rewind else None) for r in rules]
+        self._triggers: Dict[FrozenSet[str], "re.Pattern"] = {}
+
+    def _trigger_re(self, triggers: FrozenSet[str]) -> "re.Pattern":
+        rx = self._triggers.get(triggers)
+        if rx is None:
+            alts = [_trie(t for t in triggers if t != DIGIT)] + ([DIGIT] if DIGIT in triggers else [])
+            rx = self._triggers[triggers] = re.compile("(?=" + "|".join(a for a in alts if a) + ")", re.I)
+        return rx
+
+    def scan(self, text: str, page_starts: Sequence[int] = (0,)) -> Dict[str, List[Hit]]:
+        """Run every rule over text in one pass. page_starts are the offsets where each page begins."""
+        hits: Dict[str, List[Hit]] = {c.rule.name: [] for c in self.rules}
+        floor = {c.rule.name: 0 for c in self.rules}  # next offset a rule may match from
+        live = list(self.rules)
+
+        def index(rules):
+            by_char: Dict[str, List[_Compiled]] = {}
+            digit: List[_Compiled] = []
+            for c in rules:
+                for t in c.rule.triggers:
+                    bucket = digit if t == DIGIT else by_char.setdefault(t[0], [])
+                    if c not in bucket:
+                        bucket.append(c)
+            for ch, bucket in by_char.items():  # e.g. "1.2" shares its first char with DIGIT rules
+                if ch.isdecimal():
+                    bucket.extend(c for c in digit if c not in bucket)
+            trig = self._trigger_re(frozenset(t for c in rules for t in c.rule.triggers))
+            return by_char, digit, trig
+
+        by_char, digit, trig = index(live)
+        pos = 0
+        while live:
+            resolved = False
+            for cand in trig.finditer(text, pos):
+                p = cand.start()
+                ch = text[p]
+                bucket = by_char.get(_key(ch))
+                if bucket is None:
+                    bucket = digit if ch.isdecimal() else ()
+                for c in bucket:
+                    name = c.rule.name
+                    start = p
+                    if c.rewind is not None:
+                        while start > floor[name] and c.rewind.match(text, start - 1):
+                            start -= 1
+                    if start < floor[name]:
+                        continue
+                    m = c.regex.match(text, start)
+                    if not m:
+                        continue
+                    value = (m.group(1) or "") if c.regex.groups else m.group(0)
+                    page = bisect.bisect_right(page_starts, m.start()) - 1
+                    hits[name].append(Hit(name, value.strip(), m.start(), m.end(), max(page, 0)))
+                    floor[name] = m.end() if m.end() > m.start() else m.end() + 1
+                    if c.rule.limit and len(hits[name]) >= c.rule.limit:
+                        resolved = True
+                if resolved:
+                    pos = p + 1
+                    break
+            else:
+                break
+            live = [c for c in live if not c.rule.limit or len(hits[c.rule.name]) < c.rule.limit]
+            by_char, digit, trig = index(live)
+        return hits
+
+DEFAULT = RuleSet(RULES)
+
+def page_starts(pages: Sequence[str], sep: str = "\n\n") -> List[int]:
+    """Offsets of each page within sep.join(pages)."""
+    starts, off = [], 0
+    for p in pages:
+        starts.append(off)
+        off += len(p) + len(sep)
+    return starts or [0]
+
+def scan(text: str, starts: Sequence[int] = (0,)) -> Dict[str, List[Hit]]:
+    return DEFAULT.scan(text, starts)
@@ -0,0 +1,6 @@
+"""gunicorn settings, read from the working directory (the Dockerfile runs gunicorn in /app)."""
+
+def post_fork(server, worker):
+    # job pump and background warm-up start here, in the worker, never in a --preload master
+    import app_factory
+    app_factory.worker_started()
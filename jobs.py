@@ -0,0 +1,256 @@
+"""Asynchronous summarization jobs.
+
+Jobs live in a SQLite database next to their input PDFs (JOBS_DIR), so a queued
+or half-run job survives a worker restart: any process that finds a running job
+whose heartbeat is older than JOBS_LEASE_S puts it back on the queue. Every
+gunicorn worker drains the shared queue on the worker_pool threads; claims are
+serialised with BEGIN IMMEDIATE so a job only ever runs once at a time.
+"""
+import os, json, time, uuid, shutil, sqlite3, tempfile, threading, traceback
+from typing import Optional, Union
+
+import summarizer, worker_pool
+from uploads import Upload
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,              -- queued | running | done | failed
+    filename TEXT,
+    sha256 TEXT,
+    max_pages INTEGER,
+    pages_done INTEGER DEFAULT 0,
+    pages_total INTEGER,
+    result TEXT,                       -- JSON from summarizer.summarize
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    created REAL, started REAL, finished REAL, heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created);
+"""
+
+class QueueFull(Exception):
+    pass
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name) or default)
+
+class JobStore:
+    def __init__(self, directory: str, max_queue: int = 32, lease_s: float = 600, max_attempts: int = 3,
+                 ttl_s: float = 86400):
+        self.directory = directory
+        self.max_queue, self.lease_s, self.max_attempts, self.ttl_s = max_queue, lease_s, max_attempts, ttl_s
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "jobs.sqlite3")
+        self._local = threading.local()
+        with self._db() as db:
+            db.executescript(SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def pdf_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id + ".pdf")
+
+    # --------- queue ---------
+
+    def depth(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued','running')").fetchone()[0]
+
+    def submit(self, pdf: Union[Upload, bytes], filename: str, max_pages: int, sha: Optional[str] = None) -> dict:
+        """Store the PDF and queue a job; raises QueueFull past max_queue queued+running jobs."""
+        if self.depth() >= self.max_queue:
+            raise QueueFull(f"{self.max_queue} jobs already queued or running")
+        job_id = uuid.uuid4().hex
+        dest = self.pdf_path(job_id)
+        if isinstance(pdf, Upload):
+            try:
+                os.link(pdf.path, dest)  # same filesystem: no copy
+            except OSError:
+                shutil.copyfile(pdf.path, dest)
+            sha = pdf.sha256
+        else:
+            with open(dest, "wb") as fh:
+                fh.write(pdf)
+        self._db().execute(
+            "INSERT INTO jobs (id, status, filename, sha256, max_pages, created) VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, filename, sha, max_pages, time.time()))
+        return self.get(job_id)
+
+    def _recover(self, db: sqlite3.Connection, now: float):
+        stale = now - self.lease_s
+        lost = [r[0] for r in db.execute("SELECT id FROM jobs WHERE status = 'running' AND heartbeat < ? "
+                                         "AND attempts >= ?", (stale, self.max_attempts))]
+        db.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                   "error = CASE WHEN attempts >= ? THEN 'worker lost too many times' ELSE error END, "
+                   "finished = CASE WHEN attempts >= ? THEN ? ELSE finished END "
+                   "WHERE status = 'running' AND heartbeat < ?",
+                   (self.max_attempts, self.max_attempts, self.max_attempts, now, stale))
+        for job_id in lost:
+            self._drop_pdf(job_id)
+
+    def queued(self) -> int:
+        """Jobs waiting for a thread, after re-queueing any whose worker died."""
+        db = self._db()
+        self._recover(db, time.time())
+        return db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def claim(self) -> Optional[sqlite3.Row]:
+        """Take the oldest queued job, first re-queueing running jobs whose lease has expired."""
+        db, now = self._db(), time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._recover(db, now)
+            row = db.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            if row:
+                db.execute("UPDATE jobs SET status = 'running', started = ?, heartbeat = ?, attempts = attempts + 1, "
+                           "pages_done = 0 WHERE id = ?", (now, now, row["id"]))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return row
+
+    def progress(self, job_id: str, done: int, total: int):
+        self._db().execute("UPDATE jobs SET pages_done = ?, pages_total = ?, heartbeat = ? WHERE id = ?",
+                           (done, total, time.time(), job_id))
+
+    def finish(self, job_id: str, result: dict):
+        self._db().execute("UPDATE jobs SET status = 'done', result = ?, finished = ?, heartbeat = ? WHERE id = ?",
+                           (json.dumps(result), time.time(), time.time(), job_id))
+        self._drop_pdf(job_id)
+
+    def fail(self, job_id: str, error: str):
+        self._db().execute("UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ?",
+                           (error, time.time(), job_id))
+        self._drop_pdf(job_id)
+
+    def _drop_pdf(self, job_id: str):
+        try: os.remove(self.pdf_path(job_id))
+        except OSError: pass
+
+    def expire(self):
+        """Forget finished jobs older than ttl_s, and delete input PDFs no queued or running job owns."""
+        db, now = self._db(), time.time()
+        db.execute("DELETE FROM jobs WHERE status IN ('done','failed') AND finished < ?", (now - self.ttl_s,))
+        live = {r[0] for r in db.execute("SELECT id FROM jobs WHERE status IN ('queued','running')")}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                # submit() writes the PDF just before its row, so leave recent files alone
+                if name.endswith(".pdf") and name[:-4] not in live and os.path.getmtime(path) < now - self.lease_s:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    # --------- reporting ---------
+
+    def get(self, job_id: str, with_result: bool = True) -> Optional[dict]:
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {"id": row["id"], "status": row["status"], "filename": row["filename"], "sha256": row["sha256"],
+               "progress": {"pages_done": row["pages_done"] or 0, "pages_total": row["pages_total"]},
+               "attempts": row["attempts"], "created": row["created"], "started": row["started"],
+               "finished": row["finished"], "error": row["error"]}
+        if with_result and row["result"]:
+            job["result"] = json.loads(row["result"])
+        return job
+
+    def stats(self) -> dict:
+        db = self._db()
+        counts = {s: 0 for s in ("queued", "running", "done", "failed")}
+        counts.update({r[0]: r[1] for r in db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")})
+        oldest = db.execute("SELECT MIN(created) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return {**counts, "depth": counts["queued"] + counts["running"], "max_queue": self.max_queue,
+                "oldest_queued_s": round(time.time() - oldest, 3) if oldest else 0.0,
+                "workers": worker_pool.size(), "in_flight": worker_pool.in_flight()}
+
+# --------- runner ---------
+
+def _run(store: JobStore, row: sqlite3.Row):
+    job_id = row["id"]
+    try:
+        result = summarizer.summarize(store.pdf_path(job_id), row["filename"] or "document.pdf",
+                                      row["max_pages"] or 20, sha=row["sha256"],
+                                      progress=lambda done, total: store.progress(job_id, done, total))
+        store.finish(job_id, result)
+    except Exception as e:
+        traceback.print_exc()
+        store.fail(job_id, f"{type(e).__name__}: {e}")
+
+def _drain(store: JobStore):
+    while True:
+        row = store.claim()
+        if row is None:
+            return
+        _run(store, row)
+
+def pump(store: Optional[JobStore] = None) -> int:
+    """Put idle pool threads to work on the queue (also picks up jobs orphaned by a dead worker)."""
+    store = store or default_store()
+    free = worker_pool.free_slots()
+    n = min(free, store.queued()) if free else 0
+    for _ in range(n):
+        worker_pool.submit(_drain, store)
+    return n
+
+_DEFAULT: Optional[JobStore] = None
+_DEFAULT_LOCK = threading.Lock()
+
+def default_store() -> JobStore:
+    """Process-wide store configured from JOBS_DIR / JOBS_MAX_QUEUE / JOBS_LEASE_S / JOBS_TTL_S."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = JobStore(
+                os.environ.get("JOBS_DIR") or os.path.join(tempfile.gettempdir(), "summarizer-jobs"),
+                max_queue=_env_int("JOBS_MAX_QUEUE", 32),
+                lease_s=float(os.environ.get("JOBS_LEASE_S") or 600),
+                ttl_s=float(os.environ.get("JOBS_TTL_S") or 86400),
+            )
+            _DEFAULT.expire()
+        return _DEFAULT
+
+def _pump_freed_slot():
+    # a finished task (job, batch document) frees a slot: hand it to the queue
+    if _DEFAULT is not None:
+        pump(_DEFAULT)
+
+worker_pool.on_done(_pump_freed_slot)
+
+_PUMPER_PID: Optional[int] = None
+EXPIRE_EVERY_S = 600
+
+def start_pumping(interval_s: Optional[float] = None):
+    """Pump now and every JOBS_PUMP_S seconds from a daemon thread, once per process.
+
+    Call it in each serving process (after any fork): it resumes jobs left by a
+    restarted worker, including ones whose lease only expires later, and expires
+    old jobs every EXPIRE_EVERY_S.
+    """
+    global _PUMPER_PID
+    with _DEFAULT_LOCK:
+        if _PUMPER_PID == os.getpid():
+            return
+        _PUMPER_PID = os.getpid()
+    interval = interval_s or float(os.environ.get("JOBS_PUMP_S") or 30)
+
+    def loop():
+        expired = time.time()  # default_store() expires on creation
+        while True:
+            try:
+                pump()
+                if time.time() - expired >= EXPIRE_EVERY_S:
+                    expired = time.time()
+                    default_store().expire()
+            except Exception as e:
+                print(f"jobs: pump failed: {type(e).__name__}: {e}", flush=True)
+            time.sleep(interval)
+    threading.Thread(target=loop, name="jobs-pump", daemon=True).start()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Local OpenAI-compatible stub for exercising the LLM summary stage offline.
+
+    python llm_stub.py --port 8089 [--delay 0.2] [--fail-every 3]
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 LLM_SUMMARY=1 python app.py
+
+POST /v1/chat/completions answers with the first few sentence-like lines of the
+user message as bullets (deterministic, so cache hits are easy to see). --delay
+slows every reply; --fail-every N returns 503 on every Nth request to exercise
+retries and the fallback.
+"""
+import json, time, argparse, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Stub(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_every = 0
+    count = 0
+    lock = threading.Lock()
+
+    def _send(self, code: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            return self._send(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "local"}]})
+        self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": "not found"}})
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        with Stub.lock:
+            Stub.count += 1
+            n = Stub.count
+        if Stub.delay:
+            time.sleep(Stub.delay)
+        if Stub.fail_every and n % Stub.fail_every == 0:
+            return self._send(503, {"error": {"message": "stub: simulated overload", "type": "server_error"}})
+        user = next((m["content"] for m in reversed(req.get("messages", [])) if m.get("role") == "user"), "")
+        lines = [ln.strip(" -•\t") for ln in user.splitlines()]
+        picked = [ln[:160] for ln in lines if len(ln) >= 20][:5] or ["No content."]
+        content = "\n".join(f"- {ln}" for ln in picked)
+        self._send(200, {
+            "id": f"chatcmpl-stub-{n}", "object": "chat.completion", "created": int(time.time()),
+            "model": req.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(user) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(user) + len(content)) // 4},
+        })
+
+    def log_message(self, fmt, *args):
+        print(f"STUB: {self.address_string()} {fmt % args}", flush=True)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds to wait before each reply")
+    ap.add_argument("--fail-every", type=int, default=0, help="return 503 on every Nth request")
+    args = ap.parse_args(argv)
+    Stub.delay, Stub.fail_every = args.delay, args.fail_every
+    server = ThreadingHTTPServer((args.host, args.port), Stub)
+    print(f"STUB: listening on http://{args.host}:{args.port}/v1", flush=True)
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
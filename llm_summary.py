@@ -0,0 +1,211 @@
+"""Optional LLM executive summary (map/reduce over token-budgeted chunks).
+
+The extracted text is cut into chunks along section headings, each chunk is
+summarised concurrently, and the notes are combined into one bullet list. All
+calls go through a single AsyncOpenAI client owned by a background event loop
+(one per process), with at most LLM_MAX_INFLIGHT requests open at once, retries
+with exponential backoff, and chunk results cached by content hash so an amended
+RFP only re-sends the sections that changed.
+
+summarize() returns None whenever the model is unavailable, fails, or runs past
+LLM_BUDGET_S; callers then keep the heuristic summary. Any OpenAI-compatible
+server works (OPENAI_BASE_URL), including llm_stub.py for local testing.
+"""
+import os, re, time, zlib, random, asyncio, threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import List, Optional
+
+from summary_cache import SummaryCache, default_cache, digest, entry_key
+
+PROMPT_VERSION = 1
+MAX_BULLETS = 8
+
+MAP_PROMPT = ("You summarise one section of a Canadian government tender (RFP) for bid/no-bid triage. "
+              "Reply with at most 5 short bullet points, one per line: scope, deliverables, mandatory "
+              "requirements, dates, evaluation. No preamble.")
+REDUCE_PROMPT = ("Combine these notes on the sections of one tender into an executive summary of at most "
+                 f"{MAX_BULLETS} bullet points, one per line, most important first. No preamble.")
+
+# PART 3, ANNEX A, 1.2 Summary, or a short all-caps line
+HEADING = re.compile(r"^[ \t]*(?:(?:PART|ANNEX|APPENDIX|SCHEDULE)\s+[A-Z0-9]+\b.{0,70}"
+                     r"|\d+(?:\.\d+){0,3}\.?[ \t]+[A-Z][^\n]{2,70}|[A-Z][A-Z0-9 ,&'/()-]{5,70})[ \t]*$", re.M)
+BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+def _env(name: str, default: str) -> str:
+    return os.environ.get(name) or default
+
+def enabled() -> bool:
+    return _env("LLM_SUMMARY", "0") not in ("0", "false", "no", "off")
+
+def model() -> str:
+    return _env("LLM_MODEL", "gpt-4o-mini")
+
+def chunk_tokens() -> int:
+    return int(_env("LLM_CHUNK_TOKENS", "3000"))
+
+def budget_s() -> float:
+    return float(_env("LLM_BUDGET_S", "20"))
+
+# --------- chunking ---------
+
+def tokens(text: str) -> int:
+    """Rough token count (~4 chars per token for English/French prose); no tokenizer dependency."""
+    return len(text) // 4 + 1
+
+def sections(text: str) -> List[str]:
+    """Text split before every heading line; joining the pieces gives the text back."""
+    cuts = [m.start() for m in HEADING.finditer(text) if m.start() > 0]
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)]) if text[a:b].strip()]
+
+def _split(text: str, budget: int, seps=("\n\n", "\n", " ")) -> List[str]:
+    """Break one oversize section on paragraphs, then lines, then words, packing pieces up to budget."""
+    if tokens(text) <= budget:
+        return [text]
+    if not seps:
+        step = budget * 4
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    parts = text.split(seps[0])
+    out, cur = [], ""
+    for piece in [p + seps[0] for p in parts[:-1]] + parts[-1:]:
+        if cur and tokens(cur + piece) > budget:
+            out.append(cur); cur = ""
+        if tokens(piece) > budget:
+            out += _split(piece, budget, seps[1:])
+        else:
+            cur += piece
+    return out + [cur] if cur.strip() else out
+
+def _anchor(section: str) -> bool:
+    # Content-defined boundary: about one heading in four closes a chunk, so edits in
+    # one section don't shift every later chunk (and invalidate its cached result).
+    return zlib.crc32(section.split("\n", 1)[0].strip().encode()) % 4 == 0
+
+def chunks(text: str, budget: Optional[int] = None) -> List[str]:
+    """Whole sections packed into chunks of at most `budget` tokens (oversize sections are split)."""
+    budget = budget or chunk_tokens()
+    out, cur = [], ""
+    for sec in sections(text):
+        for piece in _split(sec, budget):
+            if cur and tokens(cur + piece) > budget:
+                out.append(cur); cur = ""
+            cur += piece
+        if _anchor(sec) and cur:
+            out.append(cur); cur = ""
+    if cur.strip():
+        out.append(cur)
+    return out
+
+def bullets(reply: str, limit: int = MAX_BULLETS) -> List[str]:
+    lines = [BULLET.sub("", ln).strip() for ln in (reply or "").splitlines()]
+    return [ln[:300] for ln in lines if len(ln) >= 3][:limit]
+
+# --------- client, event loop ---------
+
+_LOCK = threading.Lock()
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_PID: Optional[int] = None
+_CLIENT = None           # AsyncOpenAI, created on the loop thread
+_SEM: Optional[asyncio.Semaphore] = None
+_DOWN_UNTIL = 0.0        # skip the model until then after a failure
+STATS = {"requests": 0, "retries": 0, "chunk_cache_hits": 0, "ok": 0, "failed": 0, "timeouts": 0}
+
+def _openai():
+    try:
+        import openai
+        return openai
+    except ImportError:
+        return None
+
+def available() -> bool:
+    """openai importable, an endpoint configured, and no recent failure."""
+    if time.time() < _DOWN_UNTIL or _openai() is None:
+        return False
+    return bool(os.environ.get("OPENAI_API_KEY") or os.environ.get("OPENAI_BASE_URL"))
+
+def _mark_down():
+    global _DOWN_UNTIL
+    _DOWN_UNTIL = time.time() + float(_env("LLM_COOLDOWN_S", "30"))
+
+def _loop() -> asyncio.AbstractEventLoop:
+    """Per-process event loop thread (re-created after fork, like the other pools)."""
+    global _LOOP, _LOOP_PID, _CLIENT, _SEM
+    with _LOCK:
+        if _LOOP is None or _LOOP_PID != os.getpid():
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="llm-loop", daemon=True).start()
+            _LOOP_PID, _CLIENT, _SEM = os.getpid(), None, None
+        return _LOOP
+
+def _client():
+    # only ever called on the loop thread, so no lock needed
+    global _CLIENT, _SEM
+    if _CLIENT is None:
+        openai = _openai()
+        _CLIENT = openai.AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY") or "unused",
+                                     base_url=os.environ.get("OPENAI_BASE_URL") or None,
+                                     timeout=float(_env("LLM_TIMEOUT_S", "30")), max_retries=0)
+        _SEM = asyncio.Semaphore(int(_env("LLM_MAX_INFLIGHT", "4")))
+    return _CLIENT, _SEM
+
+def _retryable(e: Exception) -> bool:
+    openai = _openai()
+    if isinstance(e, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(e, openai.APIStatusError) and e.status_code in (408, 409, 429)
+
+async def _complete(system: str, user: str) -> str:
+    client, sem = _client()
+    retries = int(_env("LLM_RETRIES", "3"))
+    for attempt in range(retries + 1):
+        try:
+            async with sem:
+                STATS["requests"] += 1
+                resp = await client.chat.completions.create(
+                    model=model(), temperature=0, max_tokens=400,
+                    messages=[{"role": "system", "content": system}, {"role": "user", "content": user}])
+            return resp.choices[0].message.content or ""
+        except Exception as e:
+            if attempt >= retries or not _retryable(e):
+                raise
+            STATS["retries"] += 1
+            await asyncio.sleep(min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+async def _cached(cache: SummaryCache, system: str, text: str, limit: int) -> List[str]:
+    key = entry_key(digest(text.encode("utf-8")), model(), PROMPT_VERSION, digest(system.encode("utf-8")), limit)
+    loop = asyncio.get_running_loop()
+    got = await loop.run_in_executor(None, cache.get, "llm", key)  # disk tier: keep it off the loop
+    if got is not None:
+        STATS["chunk_cache_hits"] += 1
+        return got
+    out = bullets(await _complete(system, text), limit)
+    if out:
+        await loop.run_in_executor(None, cache.put, "llm", key, out)
+    return out
+
+async def _summarize(text: str, cache: SummaryCache) -> List[str]:
+    parts = chunks(text)
+    if len(parts) == 1:
+        return await _cached(cache, MAP_PROMPT, parts[0], MAX_BULLETS)
+    notes = await asyncio.gather(*(_cached(cache, MAP_PROMPT, p, 5) for p in parts))
+    joined = "\n\n".join("\n".join(f"- {b}" for b in n) for n in notes if n)
+    return await _cached(cache, REDUCE_PROMPT, joined, MAX_BULLETS)
+
+def summarize(text: str, cache: Optional[SummaryCache] = None, budget: Optional[float] = None) -> Optional[List[str]]:
+    """LLM executive summary bullets, or None (unavailable, error, over budget) to fall back."""
+    if not text.strip() or not available():
+        return None
+    fut = asyncio.run_coroutine_threadsafe(_summarize(text, cache or default_cache()), _loop())
+    try:
+        out = fut.result(timeout=budget or budget_s())
+    except FutureTimeout:
+        fut.cancel()  # chunks finished so far stay cached for the next attempt
+        STATS["timeouts"] += 1
+        print(f"LLM: over {budget or budget_s()}s budget, using heuristic summary", flush=True)
+        return None
+    except Exception as e:
+        STATS["failed"] += 1
+        _mark_down()
+        print(f"LLM: {type(e).__name__}: {e}; using heuristic summary", flush=True)
+        return None
+    STATS["ok"] += 1
+    return out or None
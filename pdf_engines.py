@@ -0,0 +1,205 @@
+"""Page-level PDF text extraction over pluggable engines.
+
+Engines are tried fastest-first; the first one that returns usable text on a
+short probe wins and extracts the rest of the document. Page ranges are fanned
+out over a bounded process pool and put back in page order. A page that fails
+to extract comes back as "" so one bad page never sinks the document.
+"""
+import io, os, mmap, threading, importlib.util, multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+Source = Union[bytes, str]  # raw PDF bytes, or a path to the PDF on disk
+Progress = Optional[Callable[[int, int], None]]  # (pages_done, pages_total)
+
+PROBE_PAGES = 3          # pages used to decide whether an engine yields usable text
+USABLE_MIN_CHARS = 16    # non-whitespace chars the probe must produce
+PARALLEL_MIN_PAGES = 8   # below this, the pool round trip costs more than it saves
+MIN_CHUNK_PAGES = 4
+
+def _stream(source: Source):
+    """File-like view of the PDF; files are memory-mapped rather than read."""
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    return io.BytesIO(source)
+
+# --------- engines ---------
+
+# pdfium is not thread-safe, not even across separate documents; the probe and short
+# documents run in the calling thread, and request, job and batch threads overlap.
+_PDFIUM_LOCK = threading.Lock()
+
+def _pdfium_count(source: Source) -> int:
+    import pypdfium2 as pdfium
+    with _PDFIUM_LOCK:
+        doc = pdfium.PdfDocument(source)
+        try: return len(doc)
+        finally: doc.close()
+
+def _pdfium_pages(source: Source, start: int, stop: int) -> List[str]:
+    with _PDFIUM_LOCK:
+        return _pdfium_pages_locked(source, start, stop)
+
+def _pdfium_pages_locked(source: Source, start: int, stop: int) -> List[str]:
+    import pypdfium2 as pdfium
+    doc = pdfium.PdfDocument(source)
+    out = []
+    try:
+        for i in range(start, stop):
+            try:
+                page = doc[i]
+                tp = page.get_textpage()
+                out.append(tp.get_text_bounded() or "")
+                tp.close(); page.close()
+            except Exception: out.append("")
+    finally: doc.close()
+    return out
+
+def _pypdf_count(source: Source, module: str = "pypdf") -> int:
+    reader = importlib.import_module(module).PdfReader(_stream(source))
+    return len(reader.pages)
+
+def _pypdf_pages(source: Source, start: int, stop: int, module: str = "pypdf") -> List[str]:
+    reader = importlib.import_module(module).PdfReader(_stream(source))
+    out = []
+    for i in range(start, stop):
+        try: out.append(reader.pages[i].extract_text() or "")
+        except Exception: out.append("")
+    return out
+
+def _plumber_count(source: Source) -> int:
+    import pdfplumber
+    with pdfplumber.open(_stream(source)) as pdf:
+        return len(pdf.pages)
+
+def _plumber_pages(source: Source, start: int, stop: int) -> List[str]:
+    import pdfplumber
+    out = []
+    with pdfplumber.open(_stream(source)) as pdf:
+        for i in range(start, stop):
+            try: out.append(pdf.pages[i].extract_text() or "")
+            except Exception: out.append("")
+    return out
+
+class Engine(NamedTuple):
+    name: str
+    module: str
+    count: Callable[[Source], int]
+    pages: Callable[[Source, int, int], List[str]]
+
+    def available(self) -> bool:
+        try: return importlib.util.find_spec(self.module) is not None
+        except (ImportError, ValueError): return False
+
+# Fastest first. PyPDF2 stays last as the legacy fallback.
+ENGINES: Dict[str, Engine] = {e.name: e for e in (
+    Engine("pypdfium2", "pypdfium2", _pdfium_count, _pdfium_pages),
+    Engine("pypdf", "pypdf", _pypdf_count, _pypdf_pages),
+    Engine("pdfplumber", "pdfplumber", _plumber_count, _plumber_pages),
+    Engine("PyPDF2", "PyPDF2",
+           lambda s: _pypdf_count(s, "PyPDF2"),
+           lambda s, a, b: _pypdf_pages(s, a, b, "PyPDF2")),
+)}
+
+def engine_order(preferred: Optional[str] = None) -> List[str]:
+    """Installed engines to try, in order. PDF_ENGINE (comma list) overrides the default."""
+    wanted = preferred or os.environ.get("PDF_ENGINE", "")
+    names = [n.strip() for n in wanted.split(",") if n.strip() in ENGINES] or list(ENGINES)
+    return [n for n in names if ENGINES[n].available()]
+
+# --------- process pool ---------
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_PID: Optional[int] = None
+_POOL_LOCK = threading.Lock()
+
+def pool_size() -> int:
+    return max(1, int(os.environ.get("PDF_WORKERS") or os.cpu_count() or 1))
+
+def _pool() -> ProcessPoolExecutor:
+    """Lazily created per process, so gunicorn workers never share a forked pool."""
+    global _POOL, _POOL_PID
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            _POOL = ProcessPoolExecutor(max_workers=pool_size(), mp_context=mp.get_context(method))
+            _POOL_PID = os.getpid()
+        return _POOL
+
+def _reset_pool(broken: Optional[ProcessPoolExecutor] = None):
+    """Drop the pool (only if it is still `broken`, so a racing thread's fresh pool survives)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None and (broken is None or _POOL is broken):
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+def _extract_range(name: str, source: Source, start: int, stop: int) -> List[str]:
+    """Pool task: one engine over one page range; never raises."""
+    try:
+        pages = ENGINES[name].pages(source, start, stop)
+    except Exception:
+        pages = []
+    return (pages + [""] * (stop - start))[: stop - start]
+
+def _chunks(start: int, stop: int, workers: int) -> List[Tuple[int, int]]:
+    n = stop - start
+    size = max(MIN_CHUNK_PAGES, -(-n // (workers * 2)))
+    return [(a, min(a + size, stop)) for a in range(start, stop, size)]
+
+def _extract_rest(name: str, source: Source, start: int, stop: int, progress: Progress = None) -> List[str]:
+    if stop <= start:
+        return []
+    workers = pool_size()
+    if workers <= 1 or stop - start < PARALLEL_MIN_PAGES:
+        pages = _extract_range(name, source, start, stop)
+        if progress: progress(stop, stop)
+        return pages
+    ranges = _chunks(start, stop, workers)
+    pool = _pool()
+    try:
+        futures = {pool.submit(_extract_range, name, source, a, b): (a, b) for a, b in ranges}
+        done = start
+        for f in as_completed(futures):
+            a, b = futures[f]
+            done += b - a
+            if progress: progress(done, stop)
+        return [page for f in futures for page in f.result()]
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        return _extract_range(name, source, start, stop)
+
+# --------- public API ---------
+
+def _usable(pages: List[str]) -> int:
+    return sum(len("".join(p.split())) for p in pages)
+
+def extract_pages(source: Source, max_pages: int = 20, engine: Optional[str] = None,
+                  progress: Progress = None) -> Tuple[List[str], Optional[str]]:
+    """Return (page_texts, engine_name) for the first max_pages pages.
+
+    Engines are probed on the first PROBE_PAGES pages in speed order; the first
+    whose probe yields usable text extracts the remainder. If none does (e.g. a
+    scanned PDF), the engine with the most probe text is used. Returns ([], None)
+    when no engine can open the document. progress(pages_done, pages_total) is
+    called as page ranges finish.
+    """
+    best = None  # (score, name, n, probe)
+    for name in engine_order(engine):
+        try:
+            n = min(ENGINES[name].count(source), max_pages)
+        except Exception:
+            continue
+        probe = _extract_range(name, source, 0, min(n, PROBE_PAGES))
+        score = _usable(probe)
+        if best is None or score > best[0]:
+            best = (score, name, n, probe)
+        if n == 0 or score >= USABLE_MIN_CHARS:
+            break
+    if best is None:
+        return [], None
+    _, name, n, probe = best
+    if progress: progress(len(probe), n)
+    return probe + _extract_rest(name, source, len(probe), n, progress), name
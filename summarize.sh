@@ -3,9 +3,10 @@ set -euo pipefail
 
 PDF="${1:-}"
 if [[ -z "$PDF" ]]; then
-  echo "Usage: ./summarize.sh <path-to-pdf>"
+  echo "Usage: ./summarize.sh <path-to-pdf> [more.pdf ...]"
   exit 1
 fi
+URL="${SUMMARIZER_URL:-http://127.0.0.1:8080}"
 
 if [[ ! -f "$PDF" ]]; then
   echo "File not found: $PDF"
@@ -17,16 +18,25 @@ TS=$(date +%Y%m%d-%H%M%S)
 OUT="out-$TS"
 mkdir -p "$OUT"
 
-# base64 the file (no line breaks)
-B64=$(base64 -i "$PDF" | tr -d '\n')
-
-# Build JSON payload
-printf '{"filename":"%s","content":"%s","max_pages":12}\n' "$(basename "$PDF")" "$B64" > /tmp/payload.json
+# Batch mode: several PDFs -> one zip -> NDJSON, one sub-folder per document
+if [[ $# -gt 1 ]]; then
+  python3 - "$OUT/batch.zip" "$@" <<'PY'
+import os,sys,zipfile
+with zipfile.ZipFile(sys.argv[1],"w",zipfile.ZIP_STORED) as z:
+    for p in sys.argv[2:]: z.write(p, os.path.basename(p))
+PY
+  curl -sS -N -H "Content-Type: application/zip" --data-binary "@$OUT/batch.zip" \
+       "$URL/ai/v2/summarize/batch?max_pages=12" \
+       | tee "$OUT/batch.ndjson" \
+       | python3 "$(dirname "$0")/bin/split-batch" "$OUT"
+  echo "Saved: $OUT/"
+  exit 0
+fi
 
-# POST to the Flask route your app actually exposes: /ai/summarize
-curl -sS -H "Content-Type: application/json" \
-     --data @/tmp/payload.json \
-     http://127.0.0.1:8080/ai/summarize \
+# Stream the PDF as a multipart file part (no base64 / JSON round trip)
+curl -sS -F "file=@${PDF};type=application/pdf" \
+     -F "max_pages=12" \
+     "$URL/ai/v2/summarize" \
      | tee "$OUT/resp.json" \
      | jq -r '.summary_html' > "$OUT/summary.html"
 
@@ -1,5 +1,14 @@
-import io, re, html, datetime as dt
-from typing import Tuple
+import html, datetime as dt
+from typing import Optional, Tuple
+
+import pdf_engines, field_rules, timing, llm_summary, tender_index
+from summary_cache import SummaryCache, default_cache, digest, entry_key, file_digest
+
+# Bump the matching version when a stage's output changes so cached entries are not reused.
+SUMMARIZER_VERSION = "0.2"
+EXTRACT_VERSION = 1
+PARSE_VERSION = 2
+TEMPLATE_VERSION = 1
 
 CSS = """
 body{font-family:-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Helvetica,Arial,sans-serif;margin:24px;color:#0f172a}
@@ -17,99 +26,75 @@ footer{margin-top:24px;color:#64748b;font-size:12px}
 """
 
 def _extract_text(pdf_bytes: bytes, max_pages: int = 20) -> Tuple[str, int]:
-    """Extract text from first N pages; try pdfplumber then PyPDF2."""
-    try:
-        import pdfplumber
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            n = min(len(pdf.pages), max_pages) if len(pdf.pages) else 0
-            chunks=[]
-            for i in range(n):
-                try: chunks.append(pdf.pages[i].extract_text() or "")
-                except Exception: chunks.append("")
-            return "\n\n".join(chunks), n
-    except Exception:
-        try:
-            from PyPDF2 import PdfReader
-            rdr = PdfReader(io.BytesIO(pdf_bytes))
-            n = min(len(rdr.pages), max_pages)
-            txt=[]
-            for i in range(n):
-                try: txt.append(rdr.pages[i].extract_text() or "")
-                except Exception: txt.append("")
-            return "\n\n".join(txt), n
-        except Exception:
-            return "", 0
-
-def _find(pattern, text, flags=re.I|re.M):
-    m = re.search(pattern, text, flags)
-    return (m.group(1).strip() if (m and m.lastindex and m.lastindex >= 1) else "")
-
-def _find_all(pattern, text, flags=re.I|re.M):
-    return [g.strip() for g in re.findall(pattern, text, flags)]
-
-def _parse_fields(txt: str) -> dict:
-    t = txt
+    """Extract text from first N pages with the fastest engine that yields usable text."""
+    pages, _engine = pdf_engines.extract_pages(pdf_bytes, max_pages)
+    return "\n\n".join(pages), len(pages)
+
+def _first(hits: dict, rule: str) -> str:
+    return hits[rule][0].value if hits.get(rule) else ""
+
+def _scan(txt: str, hits: Optional[dict]) -> dict:
+    return hits if hits is not None else field_rules.scan(txt)
+
+def _parse_fields(txt: str, hits: Optional[dict] = None) -> dict:
+    h = _scan(txt, hits)
     fields = {}
 
     # IDs / buyer
-    fields["RFP #"] = _find(r"(?:Solicitation\s*No\.\s*[-–]\s*|RFP\s*#?\s*|NRCan[-\s#:]*)\s*([A-Za-z]*[-]?\d{6,})", t)
-    if not fields["RFP #"]:
-        fields["RFP #"] = _find(r"\b(NRCan-\d{6,})\b", t)
-
-    fields["Buyer"] = _find(r"(Natural Resources Canada|NRCan|Public Works and Government Services Canada|Parks Canada|Government of Canada)", t)
-
-    # Contact
-    # Prefer the "Address Enquiries to" block; fallback to "Contracting Authority" or "Issuing Office"
-    contact_block = _find(r"(?:Address\s+Enquiries\s+to[:\-\s]*\n?.{0,120})", t) or \
-                    _find(r"(?:Contracting\s*Authority[:\-\s]*\n?.{0,120})", t) or ""
-    fields["Contact Email"] = _find(r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", contact_block or t, re.I)
-    fields["Contact Name"]  = _find(r"(?:Address\s+Enquiries\s+to[:\-\s]*|Contracting\s*Authority[:\-\s]*)([^\n@]+)", t)
-
-    # Dates (handles “Solicitation Closes … on – le 25 August 2025 at 2 p.m.”)
-    date_pat = r"((?:\d{1,2}\s*(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sept?|Oct|Nov|Dec)[a-z]*\s*,?\s*\d{4})|(?:\d{4}-\d{2}-\d{2})|(?:\d{1,2}/\d{1,2}/\d{2,4}))"
-    time_pat = r"(\d{1,2}\s*(?::\s*\d{2})?\s*(?:a\.?m\.?|p\.?m\.?|AM|PM|H))"
-    closing_line = _find(r"(?:Solicitation\s+Closes|L['’]invitation\s+prend\s+fin)[^\n]*", t)
-    fields["Closing Date"] = _find(date_pat, closing_line or t)
-    fields["Closing Time"] = _find(time_pat, closing_line or t)
+    fields["RFP #"] = _first(h, "rfp_number") or _first(h, "rfp_number_nrcan")
+    fields["Buyer"] = _first(h, "buyer")
+
+    # Contact. The old "Address Enquiries to" / "Contracting Authority" block
+    # patterns never captured a group, so the email always came from the full text.
+    fields["Contact Email"] = _first(h, "contact_email")
+    fields["Contact Name"]  = _first(h, "contact_name")
+
+    # Dates (the "Solicitation Closes" line pattern had no group either; first date/time in the text)
+    fields["Closing Date"] = _first(h, "date")
+    fields["Closing Time"] = _first(h, "time")
 
     # Submission method
-    if re.search(r"\bCPC\s+Connect\b", t, re.I):
+    if h["cpc_connect"]:
         fields["Submission Method"] = "CPC Connect (Canada Post)"
-    elif re.search(r"\bemail|courriel", t, re.I):
+    elif h["email_submission"]:
         fields["Submission Method"] = "Email"
-    elif re.search(r"Bid Receiving Unit|Mailroom", t, re.I):
+    elif h["mailroom"]:
         fields["Submission Method"] = "Physical delivery / Mailroom"
     else:
         fields["Submission Method"] = ""
 
     # Location / Delivery (best-effort)
-    fields["Delivery"] = _find(r"(?:Destination|Delivery(?:\s*Date)?)[^\n]*:\s*([^\n]+)", t)
-    fields["Location"] = _find(r"(?:Location|Work Location|Place of Work)[^\n]*:\s*([^\n]+)", t)
+    fields["Delivery"] = _first(h, "delivery")
+    fields["Location"] = _first(h, "location")
 
     # Term
-    fields["Term of Contract"] = _find(r"(?:Term\s*of\s*Contract|Contract\s*Term)[^\n]*:\s*([^\n]+)", t)
+    fields["Term of Contract"] = _first(h, "term")
 
     # Insurance
-    if re.search(r"INSURANCE\s*[-–]\s*NO\s+SPECIFIC\s+REQUIREMENT", t, re.I):
+    if h["insurance_none"]:
         fields["Insurance"] = "No specific requirement"
-    elif re.search(r"\binsurance\b", t, re.I):
+    elif h["insurance"]:
         fields["Insurance"] = "Insurance requirements apply"
     else:
         fields["Insurance"] = ""
 
     # Security
-    if re.search(r"NO\s+SECURITY\s+REQUIREMENTS", t, re.I):
+    if h["security_none"]:
         fields["Security Clearance"] = "None"
-    elif re.search(r"security\s+requirement|reliability|secret\s*clearance", t, re.I):
+    elif h["security"]:
         fields["Security Clearance"] = "Required"
     else:
         fields["Security Clearance"] = ""
 
     return fields
 
-def _exec_summary(txt: str) -> list:
+def _evidence(hits: dict) -> dict:
+    """rule -> [page, offset] of its first match."""
+    return {name: [found[0].page, found[0].start] for name, found in hits.items() if found}
+
+def _exec_summary(txt: str, hits: Optional[dict] = None) -> list:
     # Prefer text under "1.2 Summary" or "Summary"/"Introduction"/"Scope" sections
-    blocks = _find_all(r"(?:\b1\.2\s*Summary\b|^Summary\b|^Introduction\b|^Scope\b)[^\n]*\n([\s\S]{200,1000})", txt, re.I|re.M)
+    blocks = [m.value for m in _scan(txt, hits)["summary_block"]]
     seed = "\n".join(blocks[:2]) if blocks else txt[:2500]
     lines=[]
     for ln in seed.splitlines():
@@ -119,18 +104,18 @@ def _exec_summary(txt: str) -> list:
         if len(lines) >= 8: break
     return lines or ["High-level summary not confidently extracted — manual review recommended."]
 
-def _compliance_checklist(txt: str) -> list:
-    low = txt.lower()
-    def has(p): return bool(re.search(p, low))
+def _compliance_checklist(txt: str, hits: Optional[dict] = None) -> list:
+    h = _scan(txt, hits)
+    def has(rule): return bool(h[rule])
     items = [
-        ("Mandatory Site Visit", "yes" if has(r"mandatory\s+site\s+visit") else "no"),
-        ("Security Clearance", "no" if has(r"no\s+security\s+requirements") else ("yes" if has(r"security\s+requirement|reliability|secret\s*clearance") else "—")),
-        ("Insurance", "no specific requirement" if has(r"insurance\s*-\s*no\s*specific\s*requirement") else ("yes" if has(r"\binsurance\b") else "—")),
-        ("Indigenous Procurement", "yes" if has(r"indigenous|aboriginal|set-?aside") else "—"),
-        ("French/Bilingual Content", "yes" if has(r"\bfran[cç]ais\b|French") else "—"),
-        ("SOW Attached", "yes" if has(r"statement of work|annex\s*[“\"']?a[”\"']?") else "—"),
-        ("Evaluation Method", "yes" if has(r"evaluation\s+procedures|rated\s*criteria|mandatory\s+requirements") else "—"),
-        ("Form of Contract", "contract" if has(r"resulting\s+contract\s+clauses") else "—"),
+        ("Mandatory Site Visit", "yes" if has("site_visit") else "no"),
+        ("Security Clearance", "no" if has("security_none") else ("yes" if has("security") else "—")),
+        ("Insurance", "no specific requirement" if has("insurance_none_hyphen") else ("yes" if has("insurance") else "—")),
+        ("Indigenous Procurement", "yes" if has("indigenous") else "—"),
+        ("French/Bilingual Content", "yes" if has("french") else "—"),
+        ("SOW Attached", "yes" if has("sow") else "—"),
+        ("Evaluation Method", "yes" if has("evaluation") else "—"),
+        ("Form of Contract", "contract" if has("contract_clauses") else "—"),
     ]
     return items
 
@@ -156,9 +141,91 @@ def _build_html(filename: str, fields: dict, summary_pts: list, checklist: list,
 <footer>Generated locally on {dt.datetime.now().strftime('%Y-%m-%d %H:%M')}</footer>
 </body></html>"""
 
+def summarize(pdf: pdf_engines.Source, filename: str = "document.pdf", max_pages: int = 20,
+              cache: Optional[SummaryCache] = None, sha: Optional[str] = None,
+              progress: pdf_engines.Progress = None, timings: Optional[timing.Timings] = None,
+              llm: Optional[bool] = None) -> dict:
+    """Run the pipeline on PDF bytes or a path, reusing cached page text / fields / HTML for repeat uploads.
+
+    With llm (default: LLM_SUMMARY env) the executive summary comes from the model
+    when it answers within budget, else from the heuristic _exec_summary.
+    """
+    cache = cache or default_cache()
+    t = timings or timing.Timings()
+    if not sha:
+        with t.stage("hash"):
+            sha = file_digest(pdf) if isinstance(pdf, str) else digest(pdf)
+    base = (SUMMARIZER_VERSION, max_pages, EXTRACT_VERSION)
+    status = {}
+
+    k_pages = entry_key(sha, "pages", *base)
+    with t.stage("cache"):
+        got = cache.get("pages", k_pages)
+    status["pages"] = "hit" if got else "miss"
+    if not got:
+        with t.stage("extract"):
+            pages, engine = pdf_engines.extract_pages(pdf, max_pages, progress=progress)
+        got = {"pages": pages, "engine": engine}
+        if engine:
+            with t.stage("cache"):
+                cache.put("pages", k_pages, got)
+    elif progress:
+        progress(len(got["pages"]), len(got["pages"]))
+    # nothing derived from a document no engine could open is cached (a later engine may read it)
+    keep = bool(got["engine"])
+    t.labels["engine"] = got["engine"] or ""
+    text = "\n\n".join(got["pages"])
+
+    k_fields = entry_key(sha, "fields", *base, PARSE_VERSION)
+    with t.stage("cache"):
+        parsed = cache.get("fields", k_fields)
+    status["fields"] = "hit" if parsed else "miss"
+    if not parsed:
+        with t.stage("parse"):
+            hits = field_rules.scan(text, field_rules.page_starts(got["pages"]))
+            fields, checklist = _parse_fields(text, hits), _compliance_checklist(text, hits)
+        with t.stage("exec_summary"):
+            summary = _exec_summary(text, hits)
+        parsed = {"fields": fields, "summary": summary, "checklist": checklist, "evidence": _evidence(hits)}
+        if keep:
+            with t.stage("cache"):
+                cache.put("fields", k_fields, parsed)
+
+    summary, source = parsed["summary"], "heuristic"
+    if llm_summary.enabled() if llm is None else llm:
+        with t.stage("llm"):
+            generated = llm_summary.summarize(text, cache)
+        if generated:
+            summary, source = generated, "llm"
+
+    summary_key = digest("\n".join(summary).encode("utf-8")) if source == "llm" else source
+    k_html = entry_key(sha, "html", *base, PARSE_VERSION, TEMPLATE_VERSION, filename, summary_key)
+    with t.stage("cache"):
+        rendered = cache.get("html", k_html)
+    status["html"] = "hit" if rendered else "miss"
+    if not rendered:
+        with t.stage("render"):
+            rendered = {"html": _build_html(filename, parsed["fields"], summary, parsed["checklist"], text)}
+        if keep:
+            with t.stage("cache"):
+                cache.put("html", k_html, rendered)
+
+    result = {"filename": filename, "sha256": sha, "pages": len(got["pages"]), "engine": got["engine"],
+              "fields": parsed["fields"], "summary": summary, "summary_source": source,
+              "evidence": parsed["evidence"], "checklist": [list(c) for c in parsed["checklist"]],
+              "summary_html": rendered["html"], "cache": status}
+
+    index = tender_index.default_index()
+    if index is not None and got["engine"] and sha not in index:
+        with t.stage("store"):
+            try:
+                index.add(result, got["pages"])
+            except OSError as e:
+                print(f"INDEX: could not store {sha}: {e}", flush=True)
+
+    timing.record(t, filename=filename, sha256=sha, pages=len(got["pages"]), cache=status)
+    result.update(timings=t.as_dict(), total_ms=round(t.total_ms(), 3))
+    return result
+
 def summarize_pdf(pdf_bytes: bytes, filename: str = "document.pdf"):
-    text, pages = _extract_text(pdf_bytes)
-    fields = _parse_fields(text)
-    summary_pts = _exec_summary(text)
-    checklist = _compliance_checklist(text)
-    return _build_html(filename, fields, summary_pts, checklist, text)
+    return summarize(pdf_bytes, filename)["summary_html"]
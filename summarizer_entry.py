@@ -1,23 +1,4 @@
-from flask import Flask, jsonify
-from ai_routes import ai_bp
-import os
+from app_factory import create_app
 
-app = Flask(__name__)
-app.register_blueprint(ai_bp, url_prefix="/ai")
-
-@app.get("/health")
-def health():
-    return "ok", 200
-
-@app.get("/routes")
-def routes():
-    return jsonify(sorted([str(r) for r in app.url_map.iter_rules()]))
-
-@app.get("/whoami")
-def whoami():
-    return jsonify(entrypoint="summarizer_entry", revision=os.environ.get("K_REVISION"))
-
-# Emit a clear startup marker with the live route map
-print("BOOT: entry=summarizer_entry routes="
-      + str(sorted([str(r) for r in app.url_map.iter_rules()])),
-      flush=True)
+# Logs the BOOT: lines (import / warm-up times, live route map) at startup
+app = create_app("summarizer_entry")
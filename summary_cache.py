@@ -0,0 +1,228 @@
+"""Content-addressed cache for summarizer stages.
+
+Entries are keyed on the SHA-256 of the PDF bytes plus whatever else the stage
+output depends on (max_pages, stage versions, filename). Two tiers: a per-process
+LRU bounded by bytes, and an on-disk directory shared by every gunicorn worker.
+Stages (page text, parsed fields, rendered HTML) are stored separately so a
+template change only invalidates the HTML. The "llm" stage is keyed on the hash
+of each text chunk rather than the PDF, so it is shared across documents.
+
+A purge is appended to purges.log in the cache directory; every process
+replays new lines there before answering from its memory tier, so a DELETE
+handled by one worker also evicts the entry from the others. The disk tier
+defaults to a small directory under tmp; on Cloud Run that is instance memory,
+so point SUMMARY_CACHE_DIR at a mounted volume before raising SUMMARY_CACHE_DISK_MB.
+"""
+import os, json, hashlib, tempfile, threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+STAGES = ("pages", "fields", "html", "llm")
+
+def digest(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def file_digest(path: str, chunk: int = 1 << 16) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def entry_key(sha: str, *parts: Any) -> str:
+    """<sha>-<hash of parts>; the sha prefix is what purge matches on."""
+    tail = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{sha}-{tail}"
+
+class SummaryCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 64 << 20,
+                 disk_max_bytes: int = 64 << 20):
+        self.directory = directory or None
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._mem: "OrderedDict[tuple, tuple]" = OrderedDict()  # (stage, key) -> (blob, size)
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._unpruned = 0  # bytes written to disk since the last prune
+        self._purges_read = self._purge_log_size()  # older purges can't concern an empty memory tier
+        self.hits = {s: 0 for s in STAGES}
+        self.misses = {s: 0 for s in STAGES}
+
+    # --------- tiers ---------
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage, key[:2], key + ".json")
+
+    def _mem_put(self, stage: str, key: str, blob: bytes):
+        size = len(blob)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop((stage, key), None)
+            if old:
+                self._mem_bytes -= old[1]
+            self._mem[(stage, key)] = (blob, size)
+            self._mem_bytes += size
+            while self._mem_bytes > self.max_bytes:
+                _, (_, evicted) = self._mem.popitem(last=False)
+                self._mem_bytes -= evicted
+
+    def _disk_get(self, stage: str, key: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(stage, key), "rb") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def _disk_put(self, stage: str, key: str, blob: bytes):
+        if not self.directory:
+            return
+        path = self._path(stage, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(blob)
+            os.replace(tmp, path)  # atomic, so the other worker never reads a torn entry
+        except OSError:
+            return
+        self._writes += 1
+        self._unpruned += len(blob)
+        if self._writes % 64 == 0 or self._unpruned > self.disk_max_bytes // 16:
+            self._unpruned = 0
+            self.prune()
+
+    # --------- cross-process purges ---------
+
+    def _purge_log(self) -> str:
+        return os.path.join(self.directory, "purges.log")
+
+    def _purge_log_size(self) -> int:
+        try:
+            return os.path.getsize(self._purge_log()) if self.directory else 0
+        except OSError:
+            return 0
+
+    def _mem_drop(self, match) -> set:
+        # caller holds self._lock
+        doomed = [k for k in self._mem if match(k[1])]
+        for k in doomed:
+            self._mem_bytes -= self._mem.pop(k)[1]
+        return set(doomed)
+
+    def _replay_purges(self):
+        """Apply purges logged by any process since the last call to this memory tier."""
+        size = self._purge_log_size()
+        if size == self._purges_read:
+            return
+        with self._lock:
+            try:
+                with open(self._purge_log(), "rb") as fh:
+                    fh.seek(self._purges_read)
+                    data = fh.read(size - self._purges_read)
+            except OSError:
+                return
+            done = data.rfind(b"\n") + 1  # a line still being appended is picked up next time
+            self._purges_read += done
+            for line in data[:done].decode("ascii", "replace").split():
+                self._mem_drop(_matcher(None if line == "*" else line))
+
+    # --------- public API ---------
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        if self.directory:
+            self._replay_purges()
+        with self._lock:
+            item = self._mem.get((stage, key))
+            if item:
+                self._mem.move_to_end((stage, key))
+        blob = item[0] if item else self._disk_get(stage, key)
+        if blob is None:
+            self.misses[stage] += 1
+            return None
+        if not item:
+            self._mem_put(stage, key, blob)
+        self.hits[stage] += 1
+        return json.loads(blob)
+
+    def put(self, stage: str, key: str, value: Any):
+        blob = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self._mem_put(stage, key, blob)
+        self._disk_put(stage, key, blob)
+
+    def _disk_files(self):
+        """(stage, path) of every disk entry."""
+        for stage in STAGES:
+            root = os.path.join(self.directory, stage)
+            for dirpath, _, names in os.walk(root):
+                for name in names:
+                    if name.endswith(".json"):
+                        yield stage, os.path.join(dirpath, name)
+
+    def purge(self, sha: Optional[str] = None) -> int:
+        """Drop every stage for one document (by SHA-256), or everything, in every process
+        sharing the directory. Returns the number of distinct entries removed here."""
+        match = _matcher(sha)
+        with self._lock:
+            removed = self._mem_drop(match)
+        if self.directory:
+            for stage, path in list(self._disk_files()):
+                key = os.path.basename(path)[:-5]
+                if match(key):
+                    try:
+                        os.remove(path); removed.add((stage, key))
+                    except OSError:
+                        pass
+            # logged after the files are gone, so a replaying worker can't re-read one from disk
+            try:
+                with open(self._purge_log(), "a") as fh:
+                    fh.write((sha or "*") + "\n")
+            except OSError:
+                pass
+            self._replay_purges()
+        return len(removed)
+
+    def prune(self):
+        """Trim the disk tier to disk_max_bytes, oldest entries first."""
+        if not self.directory:
+            return
+        entries = []
+        for _, path in self._disk_files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path); total -= size
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = len(self._mem), self._mem_bytes
+        return {"memory_entries": entries, "memory_bytes": size, "memory_max_bytes": self.max_bytes,
+                "directory": self.directory, "hits": dict(self.hits), "misses": dict(self.misses)}
+
+def _matcher(sha: Optional[str]):
+    return (lambda key: key.startswith(sha + "-")) if sha else (lambda key: True)
+
+_DEFAULT: Optional[SummaryCache] = None
+
+def default_cache() -> SummaryCache:
+    """Process-wide cache configured from SUMMARY_CACHE_DIR / SUMMARY_CACHE_MB / SUMMARY_CACHE_DISK_MB."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = SummaryCache(
+            directory=os.environ.get("SUMMARY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "summarizer-cache")),
+            max_bytes=int(float(os.environ.get("SUMMARY_CACHE_MB", "64")) * (1 << 20)),
+            disk_max_bytes=int(float(os.environ.get("SUMMARY_CACHE_DISK_MB", "64")) * (1 << 20)),
+        )
+    return _DEFAULT
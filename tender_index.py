@@ -0,0 +1,244 @@
+"""Persistent page-text store and search index for summarised tenders.
+
+Every summarised document is appended once (deduplicated by SHA-256) to a
+segment file under INDEX_DIR. Each record holds a small JSON header (fields,
+checklist, summary, the document's distinct terms) and the zlib-compressed
+page texts. Segments are append-only and read through mmap. Each process keeps
+an in-memory term index and field index, built by tailing the segments, so
+documents ingested by another gunicorn worker show up on the next query.
+Appends are serialised across processes with flock.
+
+The index is off unless INDEX_DIR is set. Point it at a mounted volume (a GCS
+or Filestore mount on Cloud Run): Cloud Run's local filesystem is in memory,
+so segments there count against the instance's memory limit and are lost on
+scale-down.
+"""
+import os, re, json, mmap, time, zlib, fcntl, struct, bisect, threading, datetime as dt
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"TRX1"
+CHECKLIST_PREFIX = "checklist_"
+RECORD = struct.Struct(">4sII")   # magic, header length, body length
+TOKEN = re.compile(r"[^\W_]{2,}")
+MONTHS = {m: i for i, m in enumerate(("jan", "feb", "mar", "apr", "may", "jun",
+                                      "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+
+def terms(text: str) -> List[str]:
+    return TOKEN.findall(text.casefold())
+
+def slug(name: str) -> str:
+    """Field name as a query key: "Closing Date" -> closing_date, "RFP #" -> rfp."""
+    return re.sub(r"[^a-z0-9]+", "_", name.casefold()).strip("_")
+
+def iso_date(value: str) -> str:
+    """Closing dates as the rules capture them ("25 August 2025", 2025-08-25, 25/08/2025) -> YYYY-MM-DD."""
+    s = (value or "").strip()
+    try:
+        m = re.match(r"(\d{4})-(\d{2})-(\d{2})$", s)
+        if m:
+            return dt.date(int(m[1]), int(m[2]), int(m[3])).isoformat()
+        m = re.match(r"(\d{1,2})\s*([A-Za-z]{3})[a-z]*\s*,?\s*(\d{4})", s)
+        if m and m[2].lower() in MONTHS:
+            return dt.date(int(m[3]), MONTHS[m[2].lower()], int(m[1])).isoformat()
+        m = re.match(r"(\d{1,2})/(\d{1,2})/(\d{2,4})$", s)
+        if m:
+            day, month, year = int(m[1]), int(m[2]), int(m[3])
+            if month > 12:  # 08/25/2025
+                day, month = month, day
+            return dt.date(year + 2000 if year < 100 else year, month, day).isoformat()
+    except ValueError:
+        pass
+    return ""
+
+class TenderIndex:
+    def __init__(self, directory: str, segment_bytes: int = 64 << 20):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._docs: List[dict] = []                       # doc id -> header (minus terms) + location
+        self._by_sha: Dict[str, int] = {}
+        self._terms: Dict[str, List[int]] = {}            # term -> doc ids, ascending
+        self._fields: Dict[str, Dict[str, List[int]]] = {}  # field slug -> casefolded value -> doc ids
+        self._closing: List[Tuple[str, int]] = []         # (YYYY-MM-DD, doc id), sorted
+        self._read: Dict[str, int] = {}                   # segment -> bytes indexed so far
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    # --------- segments ---------
+
+    def _segments(self) -> List[str]:
+        return sorted(n for n in os.listdir(self.directory) if n.startswith("seg-") and n.endswith(".log"))
+
+    def _map(self, seg: str, size: int) -> Optional[mmap.mmap]:
+        """Read-only map covering at least `size` bytes (remapped as the segment grows)."""
+        m = self._maps.get(seg)
+        if m is None or len(m) < size:
+            with open(os.path.join(self.directory, seg), "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    return None
+                if m is not None:
+                    m.close()  # callers copy out of the map, so nothing still points into it
+                m = self._maps[seg] = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return m
+
+    def refresh(self):
+        """Index records appended since the last call (by this or any other process)."""
+        with self._lock:
+            for seg in self._segments():
+                pos = self._read.get(seg, 0)
+                size = os.path.getsize(os.path.join(self.directory, seg))
+                if size <= pos:
+                    continue
+                m = self._map(seg, size)
+                # bound by the size just read, not the map: an older, longer map may
+                # outlive a truncate by another process, and reading past EOF is SIGBUS
+                limit = min(len(m), size) if m is not None else 0
+                while pos + RECORD.size <= limit:
+                    magic, hlen, blen = RECORD.unpack_from(m, pos)
+                    end = pos + RECORD.size + hlen + blen
+                    if magic != MAGIC or end > limit:
+                        break  # torn tail from a crashed writer; the next append truncates it
+                    header = json.loads(m[pos + RECORD.size:pos + RECORD.size + hlen])
+                    self._add(header, seg, pos, end)
+                    pos = end
+                self._read[seg] = pos
+
+    def _add(self, header: dict, seg: str, pos: int, end: int):
+        if header["sha256"] in self._by_sha:
+            return
+        doc = len(self._docs)
+        for term in header.pop("terms").split():
+            self._terms.setdefault(term, []).append(doc)
+        # checklist items get their own namespace: "Security Clearance" is both a key field
+        # (the level) and a checklist item (yes/no), and neither may shadow the other
+        values = {**{slug(k): v for k, v in header["fields"].items()},
+                  **{CHECKLIST_PREFIX + slug(k): v for k, v in header["checklist"].items()}}
+        for key, value in values.items():
+            if value:
+                self._fields.setdefault(key, {}).setdefault(str(value).casefold(), []).append(doc)
+        if header.get("closing"):
+            bisect.insort(self._closing, (header["closing"], doc))
+        header["_loc"] = (seg, pos, end)
+        self._docs.append(header)
+        self._by_sha[header["sha256"]] = doc
+
+    def __contains__(self, sha: str) -> bool:
+        return sha in self._by_sha
+
+    def add(self, result: dict, pages: List[str]) -> bool:
+        """Store one summarize() result and its page texts; False if the document is already indexed."""
+        if result["sha256"] in self._by_sha:
+            return False
+        header = {"sha256": result["sha256"], "filename": result["filename"], "pages": len(pages),
+                  "engine": result.get("engine"), "fields": result["fields"],
+                  "checklist": {k: v for k, v in result["checklist"]}, "summary": result["summary"],
+                  "closing": iso_date(result["fields"].get("Closing Date", "")), "ingested": time.time(),
+                  "terms": " ".join(sorted(set(terms("\n".join(pages))) | set(terms(result["filename"]))))}
+        head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        body = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"), 6)
+        record = RECORD.pack(MAGIC, len(head), len(body)) + head + body
+        with self._lock, open(os.path.join(self.directory, "lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.refresh()
+            if result["sha256"] in self._by_sha:
+                return False
+            segs = self._segments()
+            seg = segs[-1] if segs else "seg-000000.log"
+            good = self._read.get(seg, 0)
+            if good and good + len(record) > self.segment_bytes:
+                seg, good = f"seg-{int(seg[4:10]) + 1:06d}.log", 0
+            with open(os.path.join(self.directory, seg), "ab") as fh:
+                fh.truncate(good)  # drop any torn tail before appending
+                fh.write(record)
+            self._add(header, seg, good, good + len(record))
+            self._read[seg] = good + len(record)
+        return True
+
+    # --------- reads ---------
+
+    def pages(self, sha: str) -> Optional[List[str]]:
+        with self._lock:
+            doc = self._by_sha.get(sha)
+            if doc is None:
+                return None
+            seg, pos, end = self._docs[doc]["_loc"]
+            m = self._map(seg, end)
+            _, hlen, blen = RECORD.unpack_from(m, pos)
+            start = pos + RECORD.size + hlen
+            return json.loads(zlib.decompress(m[start:start + blen]))
+
+    def _field_docs(self, key: str, value: str) -> set:
+        """Docs whose field equals value, or contains it when nothing is equal (buyer=nrcan)."""
+        values = self._fields.get(slug(key), {})
+        want = str(value).casefold()
+        if want in values:
+            return set(values[want])
+        return {d for v, docs in values.items() if want in v for d in docs}
+
+    def search(self, q: str = "", filters: Optional[Dict[str, str]] = None, closing_from: str = "",
+               closing_to: str = "", limit: int = 20, offset: int = 0) -> dict:
+        """AND of keyword terms, field filters and a closing-date range; newest documents first.
+
+        Filters are keyed by slug: key fields as is (buyer, security_clearance), checklist
+        items with a checklist_ prefix (checklist_mandatory_site_visit).
+        """
+        t0 = time.perf_counter()
+        self.refresh()
+        words = list(dict.fromkeys(terms(q)))
+        with self._lock:
+            sets = []
+            for w in sorted(words, key=lambda w: len(self._terms.get(w, ()))):
+                sets.append(set(self._terms.get(w, ())))
+            for key, value in (filters or {}).items():
+                sets.append(self._field_docs(key, value))
+            if closing_from or closing_to:
+                lo = bisect.bisect_left(self._closing, (closing_from or "0000", -1))
+                hi = bisect.bisect_right(self._closing, (closing_to or "9999", len(self._docs)))
+                sets.append({doc for _, doc in self._closing[lo:hi]})
+            if sets:
+                hits = set.intersection(*sets) if len(sets) > 1 else sets[0]
+            else:
+                hits = set(range(len(self._docs)))
+            ordered = sorted(hits, reverse=True)
+            page = [dict(self._docs[d]) for d in ordered[offset:offset + limit]]
+        results = []
+        for h in page:
+            item = {k: v for k, v in h.items() if k != "_loc"}
+            if words:
+                item["matches"] = self._matches(h["sha256"], words)
+            results.append(item)
+        return {"total": len(ordered), "offset": offset, "results": results,
+                "took_ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+    def _matches(self, sha: str, words: List[str], width: int = 80) -> dict:
+        """1-based pages mentioning any query word, and a snippet around the first mention."""
+        hit_pages, snippet = [], ""
+        for n, text in enumerate(self.pages(sha) or [], 1):
+            folded = text.casefold()
+            at = min((i for i in (folded.find(w) for w in words) if i >= 0), default=-1)
+            if at >= 0:
+                hit_pages.append(n)
+                if not snippet:
+                    snippet = " ".join(text[max(0, at - width):at + width].split())
+        return {"pages": hit_pages, "snippet": snippet}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"directory": self.directory, "documents": len(self._docs), "terms": len(self._terms),
+                    "segments": len(self._read), "bytes": sum(self._read.values()),
+                    "fields": sorted(self._fields)}
+
+_DEFAULT: Optional[TenderIndex] = None
+_DEFAULT_LOCK = threading.Lock()
+
+def default_index() -> Optional[TenderIndex]:
+    """Process-wide index configured from INDEX_DIR (unset or "" disables) / INDEX_SEGMENT_MB."""
+    global _DEFAULT
+    directory = os.environ.get("INDEX_DIR")
+    if not directory:
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = TenderIndex(directory, int(float(os.environ.get("INDEX_SEGMENT_MB") or 64) * (1 << 20)))
+            _DEFAULT.refresh()
+        return _DEFAULT
@@ -0,0 +1,162 @@
+"""Differential test: field_rules.RuleSet.scan against the inline regexes it replaced.
+
+The single-pass engine only tries a rule at positions its triggers point to, so a
+rule with an incomplete trigger list silently loses matches. These tests compare
+every rule, and the three summarizer functions built on them, with plain
+re.search / re.findall over seeded fuzz text and the sample RFP.
+"""
+import os, re, sys, random, functools
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import field_rules, summarizer, pdf_engines
+
+# --------- baseline (the pre-rule-engine summarizer, verbatim) ---------
+
+def _find(pattern, text, flags=re.I | re.M):
+    m = re.search(pattern, text, flags)
+    return (m.group(1).strip() if (m and m.lastindex and m.lastindex >= 1) else "")
+
+def _find_all(pattern, text, flags=re.I | re.M):
+    return [g.strip() for g in re.findall(pattern, text, flags)]
+
+def baseline_fields(t: str) -> dict:
+    fields = {}
+    fields["RFP #"] = _find(r"(?:Solicitation\s*No\.\s*[-–]\s*|RFP\s*#?\s*|NRCan[-\s#:]*)\s*([A-Za-z]*[-]?\d{6,})", t)
+    if not fields["RFP #"]:
+        fields["RFP #"] = _find(r"\b(NRCan-\d{6,})\b", t)
+    fields["Buyer"] = _find(r"(Natural Resources Canada|NRCan|Public Works and Government Services Canada|Parks Canada|Government of Canada)", t)
+    contact_block = _find(r"(?:Address\s+Enquiries\s+to[:\-\s]*\n?.{0,120})", t) or \
+                    _find(r"(?:Contracting\s*Authority[:\-\s]*\n?.{0,120})", t) or ""
+    fields["Contact Email"] = _find(r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", contact_block or t, re.I)
+    fields["Contact Name"] = _find(r"(?:Address\s+Enquiries\s+to[:\-\s]*|Contracting\s*Authority[:\-\s]*)([^\n@]+)", t)
+    date_pat = r"((?:\d{1,2}\s*(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sept?|Oct|Nov|Dec)[a-z]*\s*,?\s*\d{4})|(?:\d{4}-\d{2}-\d{2})|(?:\d{1,2}/\d{1,2}/\d{2,4}))"
+    time_pat = r"(\d{1,2}\s*(?::\s*\d{2})?\s*(?:a\.?m\.?|p\.?m\.?|AM|PM|H))"
+    closing_line = _find(r"(?:Solicitation\s+Closes|L['’]invitation\s+prend\s+fin)[^\n]*", t)
+    fields["Closing Date"] = _find(date_pat, closing_line or t)
+    fields["Closing Time"] = _find(time_pat, closing_line or t)
+    if re.search(r"\bCPC\s+Connect\b", t, re.I):
+        fields["Submission Method"] = "CPC Connect (Canada Post)"
+    elif re.search(r"\bemail|courriel", t, re.I):
+        fields["Submission Method"] = "Email"
+    elif re.search(r"Bid Receiving Unit|Mailroom", t, re.I):
+        fields["Submission Method"] = "Physical delivery / Mailroom"
+    else:
+        fields["Submission Method"] = ""
+    fields["Delivery"] = _find(r"(?:Destination|Delivery(?:\s*Date)?)[^\n]*:\s*([^\n]+)", t)
+    fields["Location"] = _find(r"(?:Location|Work Location|Place of Work)[^\n]*:\s*([^\n]+)", t)
+    fields["Term of Contract"] = _find(r"(?:Term\s*of\s*Contract|Contract\s*Term)[^\n]*:\s*([^\n]+)", t)
+    if re.search(r"INSURANCE\s*[-–]\s*NO\s+SPECIFIC\s+REQUIREMENT", t, re.I):
+        fields["Insurance"] = "No specific requirement"
+    elif re.search(r"\binsurance\b", t, re.I):
+        fields["Insurance"] = "Insurance requirements apply"
+    else:
+        fields["Insurance"] = ""
+    if re.search(r"NO\s+SECURITY\s+REQUIREMENTS", t, re.I):
+        fields["Security Clearance"] = "None"
+    elif re.search(r"security\s+requirement|reliability|secret\s*clearance", t, re.I):
+        fields["Security Clearance"] = "Required"
+    else:
+        fields["Security Clearance"] = ""
+    return fields
+
+def baseline_summary(txt: str) -> list:
+    blocks = _find_all(r"(?:\b1\.2\s*Summary\b|^Summary\b|^Introduction\b|^Scope\b)[^\n]*\n([\s\S]{200,1000})", txt, re.I | re.M)
+    seed = "\n".join(blocks[:2]) if blocks else txt[:2500]
+    lines = []
+    for ln in seed.splitlines():
+        s = ln.strip(" •-\t")
+        if 12 <= len(s) <= 180:
+            lines.append(s)
+        if len(lines) >= 8: break
+    return lines or ["High-level summary not confidently extracted — manual review recommended."]
+
+def baseline_checklist(txt: str) -> list:
+    low = txt.lower()
+    def has(p): return bool(re.search(p, low))
+    return [
+        ("Mandatory Site Visit", "yes" if has(r"mandatory\s+site\s+visit") else "no"),
+        ("Security Clearance", "no" if has(r"no\s+security\s+requirements") else ("yes" if has(r"security\s+requirement|reliability|secret\s*clearance") else "—")),
+        ("Insurance", "no specific requirement" if has(r"insurance\s*-\s*no\s*specific\s*requirement") else ("yes" if has(r"\binsurance\b") else "—")),
+        ("Indigenous Procurement", "yes" if has(r"indigenous|aboriginal|set-?aside") else "—"),
+        ("French/Bilingual Content", "yes" if has(r"\bfran[cç]ais\b|French") else "—"),
+        ("SOW Attached", "yes" if has(r"statement of work|annex\s*[“\"']?a[”\"']?") else "—"),
+        ("Evaluation Method", "yes" if has(r"evaluation\s+procedures|rated\s*criteria|mandatory\s+requirements") else "—"),
+        ("Form of Contract", "contract" if has(r"resulting\s+contract\s+clauses") else "—"),
+    ]
+
+# --------- corpus ---------
+
+# Text fragments that exercise every rule, their near misses and case variants.
+# No U+0130 (İ): the baseline lower()-ed the whole text, which turns it into two
+# code points and shifts offsets; the engine deliberately matches case-insensitively instead.
+VOCAB = ["Solicitation No. - ", "Solicitation No. – ", "RFP # ", "rfp", "NRCan-5000088835", "NRCan", "nrcan#",
+         "Natural Resources Canada", "Parks Canada", "Government of Canada",
+         "Public Works and Government Services Canada", "Address Enquiries to: ", "Contracting Authority ",
+         "john.doe@nrcan-rncan.gc.ca", "a@b", "x.y@z.ca", "@", "_%+", "25 August 2025", "2025-09-01", "3/4/25",
+         "2 p.m.", "14:00 H", "12 PM", "Solicitation Closes", "L'invitation prend fin", "L’invitation prend fin",
+         "CPC Connect", "email", "E-mail", "courriel", "Bid Receiving Unit", "Mailroom", "Destination: ",
+         "Delivery Date: ", "Location: ", "Work Location: ", "Place of Work: ", "Term of Contract: ", "Contract Term: ",
+         "INSURANCE - NO SPECIFIC REQUIREMENT", "Insurance – no specific requirement", "insurance",
+         "NO SECURITY REQUIREMENTS", "security requirement", "reliability", "Secret clearance", "1.2 Summary",
+         "Summary", "Introduction", "Scope", "mandatory site visit", "MANDATORY  SITE\nVISIT", "Indigenous",
+         "aboriginal", "set-aside", "setaside", "français", "FRANÇAIS", "francais", "French", "statement of work",
+         "Annex \"A\"", "annex a", "evaluation procedures", "rated criteria", "mandatory requirements",
+         "resulting contract clauses", "\n", "\n\n", " ", ":", "-", "123456", "1.2", "ſecurity", "The work is ",
+         "lorem ipsum dolor sit amet consectetur " * 3]
+
+def _fuzz(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rnd.choice(VOCAB) + rnd.choice([" ", "\n", "", " x "]) for _ in range(rnd.randint(0, 400)))
+
+def _sample_rfp() -> str:
+    path = os.path.join(ROOT, "RFP 5000088835.pdf")
+    if not os.path.exists(path) or not pdf_engines.engine_order():
+        return ""
+    pages, _ = pdf_engines.extract_pages(path, 50)
+    return "\n\n".join(pages)
+
+CORPUS = [""] + list(_fuzz(3000))
+
+@functools.lru_cache(maxsize=None)
+def _scan(text: str):
+    return field_rules.scan(text)
+
+# --------- tests ---------
+
+def _expected(rule: field_rules.Rule, text: str):
+    """(start, value) of what plain re gives for the rule: first match, first `limit`, or all."""
+    regex = re.compile(rule.pattern, rule.flags)
+    out = []
+    for m in regex.finditer(text):
+        value = (m.group(1) or "") if regex.groups else m.group(0)
+        out.append((m.start(), value.strip()))
+        if rule.limit and len(out) >= rule.limit:
+            break
+    return out
+
+@pytest.mark.parametrize("rule", field_rules.RULES, ids=lambda r: r.name)
+def test_each_rule_matches_plain_regex(rule):
+    for text in CORPUS:
+        hits = _scan(text)[rule.name]
+        assert [(h.start, h.value) for h in hits] == _expected(rule, text), repr(text[:200])
+
+def test_summarizer_matches_baseline_on_fuzz():
+    for text in CORPUS:
+        hits = _scan(text)
+        assert summarizer._parse_fields(text, hits) == baseline_fields(text), repr(text[:200])
+        assert summarizer._exec_summary(text, hits) == baseline_summary(text), repr(text[:200])
+        assert summarizer._compliance_checklist(text, hits) == baseline_checklist(text), repr(text[:200])
+
+def test_summarizer_matches_baseline_on_sample_rfp():
+    text = _sample_rfp()
+    if not text:
+        pytest.skip("no PDF engine installed")
+    hits = field_rules.scan(text)
+    assert summarizer._parse_fields(text, hits) == baseline_fields(text)
+    assert summarizer._exec_summary(text, hits) == baseline_summary(text)
+    assert summarizer._compliance_checklist(text, hits) == baseline_checklist(text)
@@ -0,0 +1,140 @@
+"""Per-stage timing for the summarizer pipeline.
+
+A Timings object times the stages of one summarize() call. Finished timings are
+folded into in-process latency histograms (served by /metrics in Prometheus text
+format), rendered as a Server-Timing header, and logged as one JSON line.
+Histograms are per process: each gunicorn worker reports its own.
+"""
+import os, json, time, threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def _peak_rss_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _reset_peak_rss() -> bool:
+    """Linux lets a process reset its own high-water mark; elsewhere peaks are cumulative."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+class Timings:
+    def __init__(self, track_rss: bool = False):
+        self.stages: List[Tuple[str, float]] = []   # (stage, ms) in run order
+        self.rss_kb: Dict[str, int] = {}            # stage -> peak RSS while it ran
+        self.labels: Dict[str, str] = {}            # e.g. engine for the extract stage
+        self.track_rss = track_rss
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.track_rss:
+            _reset_peak_rss()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - t0) * 1000))
+            if self.track_rss:
+                peak = _peak_rss_kb()
+                if peak is not None:
+                    self.rss_kb[name] = peak
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        for name, ms in self.stages:
+            out[name] = round(out.get(name, 0.0) + ms, 3)
+        return out
+
+def server_timing(timings: Dict[str, float], total_ms: Optional[float] = None) -> str:
+    parts = [f"{name};dur={ms:.1f}" for name, ms in timings.items()]
+    if total_ms is not None:
+        parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+# --------- histograms ---------
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+_LOCK = threading.Lock()
+_HISTOGRAMS: Dict[Tuple[str, str, str], Histogram] = {}   # (metric, label, value) -> histogram
+
+HELP = {
+    "summarizer_stage_seconds": ("stage", "Time spent in each summarize() stage"),
+    "summarizer_extract_seconds": ("engine", "Page extraction time per PDF engine (cache misses only)"),
+}
+
+def observe(metric: str, label_value: str, seconds: float):
+    key = (metric, HELP[metric][0], label_value)
+    with _LOCK:
+        h = _HISTOGRAMS.get(key)
+        if h is None:
+            h = _HISTOGRAMS[key] = Histogram()
+        h.observe(seconds)
+
+def record(t: Timings, **fields):
+    """Fold a finished Timings into the histograms and log it as a JSON line."""
+    stages = t.as_dict()
+    total = t.total_ms()
+    for name, ms in stages.items():
+        observe("summarizer_stage_seconds", name, ms / 1000)
+    observe("summarizer_stage_seconds", "total", total / 1000)
+    if "extract" in stages and t.labels.get("engine"):
+        observe("summarizer_extract_seconds", t.labels["engine"], stages["extract"] / 1000)
+    if os.environ.get("TIMING_LOG", "1") != "0":
+        print(json.dumps({"event": "summarize", **fields, **t.labels, "timings_ms": stages,
+                          "total_ms": round(total, 3)}, default=str), flush=True)
+
+def render_prometheus(extra: Optional[Dict[str, float]] = None) -> str:
+    """Histograms (plus optional gauges) in Prometheus text exposition format."""
+    lines = []
+    with _LOCK:
+        items = sorted(_HISTOGRAMS.items())
+        snapshot = [(k, list(h.counts), h.sum, h.count) for k, h in items]
+    seen = set()
+    for (metric, label, value), counts, total, count in snapshot:
+        if metric not in seen:
+            seen.add(metric)
+            lines += [f"# HELP {metric} {HELP[metric][1]}", f"# TYPE {metric} histogram"]
+        cumulative = 0
+        for bound, n in zip(list(BUCKETS) + ["+Inf"], counts):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{{label}="{value}"}} {total:.6f}')
+        lines.append(f'{metric}_count{{{label}="{value}"}} {count}')
+    typed = set()
+    for name, v in (extra or {}).items():
+        base = name.split("{")[0]
+        if base not in typed:
+            typed.add(base)
+            lines.append(f"# TYPE {base} gauge")
+        lines.append(f"{name} {v}")
+    return "\n".join(lines) + "\n"
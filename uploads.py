@@ -0,0 +1,96 @@
+"""Streamed PDF uploads.
+
+Request bodies (raw application/pdf or a multipart "file" part) are streamed in
+chunks to a named temp file, hashed on the way through, and handed to the
+extractor by path, which memory-maps it. Nothing holds the whole PDF in
+a Python bytes object, so peak RSS per request stays near the PDF size.
+"""
+import os, hashlib, tempfile
+from typing import BinaryIO, Optional
+
+from flask import Request
+
+from summary_cache import file_digest
+
+CHUNK = 1 << 16
+
+class UploadTooLarge(Exception):
+    pass
+
+def max_upload_bytes() -> int:
+    return int(float(os.environ.get("MAX_UPLOAD_MB", "50")) * (1 << 20))
+
+def max_batch_upload_bytes() -> int:
+    return int(float(os.environ.get("MAX_BATCH_UPLOAD_MB", "200")) * (1 << 20))
+
+def upload_dir() -> Optional[str]:
+    return os.environ.get("UPLOAD_DIR") or None
+
+class SpoolingRequest(Request):
+    """Spool multipart file parts straight to named temp files, so the route can use them in place."""
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.NamedTemporaryFile("wb+", prefix="upload-", suffix=".pdf", dir=upload_dir())
+
+class Upload:
+    """A PDF on disk: path, size, sha256 and the client's filename. Deleted on close()."""
+    def __init__(self, path: str, size: int, sha256: str, filename: str, owner=None):
+        self.path, self.size, self.sha256, self.filename = path, size, sha256, filename
+        self._owner = owner  # temp file object keeping the path alive
+
+    def close(self):
+        if self._owner is not None:
+            self._owner.close()  # NamedTemporaryFile removes itself
+            self._owner = None
+        elif self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def spool_stream(stream: BinaryIO, filename: str = "document.pdf", limit: Optional[int] = None) -> Upload:
+    """Copy a (possibly unbounded) stream to a temp file, hashing as we go; raises UploadTooLarge."""
+    limit = max_upload_bytes() if limit is None else limit
+    tmp = tempfile.NamedTemporaryFile("wb+", prefix="upload-", suffix=".pdf", dir=upload_dir())
+    h, size = hashlib.sha256(), 0
+    try:
+        while True:
+            chunk = stream.read(CHUNK)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                raise UploadTooLarge(f"upload exceeds {limit} bytes")
+            h.update(chunk)
+            tmp.write(chunk)
+        tmp.flush()
+    except BaseException:
+        tmp.close()
+        raise
+    return Upload(tmp.name, size, h.hexdigest(), filename, owner=tmp)
+
+def from_file_storage(fs, limit: Optional[int] = None) -> Upload:
+    """Adopt a multipart part in place when SpoolingRequest already wrote it to disk, else spool it."""
+    limit = max_upload_bytes() if limit is None else limit
+    filename = fs.filename or "document.pdf"
+    stream = fs.stream
+    path = getattr(stream, "name", None)
+    if not isinstance(path, str) or not os.path.exists(path):
+        return spool_stream(stream, filename, limit)
+    stream.flush()
+    size = os.path.getsize(path)
+    if size > limit:
+        stream.close()
+        raise UploadTooLarge(f"upload exceeds {limit} bytes")
+    return Upload(path, size, file_digest(path), filename, owner=stream)
+
+def init_app(app):
+    """Spool multipart parts to disk and cap request bodies (base64 JSON bodies are 4/3 the PDF).
+
+    Routes enforce their own, tighter limits while streaming; this is the outer bound.
+    """
+    app.request_class = SpoolingRequest
+    app.config.setdefault("MAX_CONTENT_LENGTH",
+                          max(max_upload_bytes() * 4 // 3, max_batch_upload_bytes()) + (1 << 16))
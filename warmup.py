@@ -0,0 +1,95 @@
+"""Boot-time warm-up, so the first request after a scale-up doesn't pay for it.
+
+Steps (WARMUP_STEPS, comma list, default all):
+  imports  import the installed PDF engines (and openai when LLM_SUMMARY is on);
+           forkserver children of the PDF pool preload them too
+  rules    run the field rules once over sample text
+  parse    extract an embedded one-page PDF with every installed engine and run
+           it through parse / summary / HTML rendering
+  index    open the summary cache and load the search index
+
+run() starts no thread or process pool and leaves no lock held, so WARMUP=1 is
+safe in a gunicorn --preload master: workers fork with the warmed modules shared
+copy-on-write. WARMUP=background runs it on a thread, so app_factory only does
+that inside a worker, never in the master.
+"""
+import os, time, importlib, multiprocessing as mp
+from typing import Dict, List, Optional
+
+import pdf_engines, field_rules, llm_summary, summarizer, tender_index
+from summary_cache import default_cache
+
+# One text page: RFP number, buyer, closing date/time, contact, summary heading, checklist terms.
+TINY_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+    b"2 0 obj\n<< /Type /Pages /Kids [4 0 R] /Count 1 >>\nendobj\n"
+    b"3 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>\nendobj\n"
+    b"4 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >>"
+    b" /Contents 5 0 R >>\nendobj\n"
+    b"5 0 obj\n<< /Length 307 >>\nstream\n"
+    b"BT /F1 10 Tf 12 TL 50 760 Td (Solicitation No. - NRCan-5000000001) Tj T* (Natural Resources Canada) Tj"
+    b" T* (Solicitation Closes on 25 August 2025 at 2 p.m.) Tj T* (Address Enquiries to: Jane Smith"
+    b" jane.smith@example.gc.ca) Tj T* (1.2 Summary) Tj T* (Mandatory site visit. Statement of Work in Annex A.)"
+    b" Tj ET\n"
+    b"endstream\nendobj\n"
+    b"xref\n0 6\n"
+    b"0000000000 65535 f \n0000000009 00000 n \n0000000058 00000 n \n0000000115 00000 n \n"
+    b"0000000185 00000 n \n0000000311 00000 n \n"
+    b"trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n669\n%%EOF\n"
+)
+
+SAMPLE_TEXT = TINY_PDF[TINY_PDF.index(b"BT "):TINY_PDF.index(b" ET")].decode("latin-1")
+
+def mode() -> str:
+    """WARMUP: 1 / sync (default), background, or 0 to skip."""
+    value = (os.environ.get("WARMUP") or "1").lower()
+    return {"0": "off", "false": "off", "no": "off", "off": "off", "background": "background"}.get(value, "sync")
+
+def steps() -> List[str]:
+    wanted = os.environ.get("WARMUP_STEPS")
+    return [s for s in _STEPS if not wanted or s in wanted.split(",")]
+
+def _imports(report: dict):
+    modules = [pdf_engines.ENGINES[n].module for n in pdf_engines.engine_order()]
+    for name in modules:
+        importlib.import_module(name)
+    if "forkserver" in mp.get_all_start_methods():
+        mp.get_context("forkserver").set_forkserver_preload(["pdf_engines", "field_rules"] + modules)
+    if llm_summary.enabled() and llm_summary._openai() is not None:
+        modules.append("openai")
+    report["modules"] = modules
+
+def _rules(report: dict):
+    report["rules"] = sum(bool(v) for v in field_rules.scan(SAMPLE_TEXT).values())
+
+def _parse(report: dict):
+    for name in pdf_engines.engine_order():
+        pdf_engines.ENGINES[name].pages(TINY_PDF, 0, 1)
+    pages, engine = pdf_engines.extract_pages(TINY_PDF, 1)
+    text = "\n\n".join(pages) or SAMPLE_TEXT
+    hits = field_rules.scan(text, field_rules.page_starts(pages or [text]))
+    fields = summarizer._parse_fields(text, hits)
+    summarizer._build_html("warmup.pdf", fields, summarizer._exec_summary(text, hits),
+                           summarizer._compliance_checklist(text, hits), text)
+    report["engine"] = engine
+
+def _index(report: dict):
+    default_cache()
+    index = tender_index.default_index()
+    report["indexed"] = index.stats()["documents"] if index is not None else None
+
+_STEPS = {"imports": _imports, "rules": _rules, "parse": _parse, "index": _index}
+
+def run(only: Optional[List[str]] = None) -> Dict[str, object]:
+    """Run the warm-up steps; returns per-step ms plus what was found. Never raises."""
+    report: Dict[str, object] = {"ms": {}}
+    for step in only or steps():
+        t0 = time.perf_counter()
+        try:
+            _STEPS[step](report)
+        except Exception as e:  # a missing engine or unreadable index must not block boot
+            report.setdefault("errors", {})[step] = f"{type(e).__name__}: {e}"
+        report["ms"][step] = round((time.perf_counter() - t0) * 1000, 1)
+    report["total_ms"] = round(sum(report["ms"].values()), 1)
+    return report
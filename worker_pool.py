@@ -0,0 +1,57 @@
+"""Bounded thread pool shared by background summarization work (jobs, batches).
+
+Sized by SUMMARIZER_WORKERS (default 2). Created lazily per process so gunicorn
+workers forked after a --preload never inherit a pool with dead threads.
+"""
+import os, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_PID: Optional[int] = None
+_LOCK = threading.Lock()
+_IN_FLIGHT = 0
+_ON_DONE: List[Callable[[], None]] = []
+
+def size() -> int:
+    return max(1, int(os.environ.get("SUMMARIZER_WORKERS", "2")))
+
+def pool() -> ThreadPoolExecutor:
+    global _POOL, _POOL_PID, _IN_FLIGHT
+    with _LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            _POOL = ThreadPoolExecutor(max_workers=size(), thread_name_prefix="summarizer")
+            _POOL_PID, _IN_FLIGHT = os.getpid(), 0
+        return _POOL
+
+def on_done(fn: Callable[[], None]):
+    """Call fn() (on the finishing thread) whenever a task frees its slot."""
+    if fn not in _ON_DONE:
+        _ON_DONE.append(fn)
+
+def _done(_f: Future):
+    global _IN_FLIGHT
+    with _LOCK:
+        _IN_FLIGHT -= 1
+    for fn in list(_ON_DONE):
+        try:
+            fn()
+        except Exception as e:
+            print(f"worker_pool: on_done {fn.__name__} failed: {type(e).__name__}: {e}", flush=True)
+
+def submit(fn, *args, **kwargs) -> Future:
+    """Queue fn on the shared pool; in_flight() counts it until it finishes."""
+    global _IN_FLIGHT
+    p = pool()
+    with _LOCK:
+        _IN_FLIGHT += 1
+    f = p.submit(fn, *args, **kwargs)
+    f.add_done_callback(_done)
+    return f
+
+def in_flight() -> int:
+    """Tasks submitted and not yet finished (running or waiting for a thread)."""
+    return _IN_FLIGHT
+
+def free_slots() -> int:
+    return max(0, size() - _IN_FLIGHT)